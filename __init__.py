@@ -1,3 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from . import models
\ No newline at end of file
+from . import controllers
+from . import models
+from . import reports
+from . import wizard
@@ -1,6 +1,6 @@
 {
     'name': 'Personalización Módulo de Compras - PERUANITA',
-    'version': '18.0.1.0.3',
+    'version': '18.0.1.5.0',
     'category': 'Purchases',
     'summary': 'Personalización del módulo de compras para formato de órdenes específico',
     'description': """
@@ -24,10 +24,19 @@
     ],
     'data': [
         'security/ir.model.access.csv',
+        'security/purchase_payable_report_security.xml',
+        'data/sequence_data.xml',
+        'data/ir_cron_data.xml',
+        'data/ir_config_parameter_data.xml',
+        'views/res_company_views.xml',
         'views/res_partner_bank_views.xml',
         'views/res_partner_views.xml',
         'views/purchase_order_views.xml',
         'views/account_payment_views.xml',
+        'wizard/purchase_treasury_batch_views.xml',
+        'wizard/purchase_order_import_views.xml',
+        'views/purchase_perf_stat_views.xml',
+        'views/purchase_payable_report_views.xml',
         'reports/purchase_order_templates.xml',
     ],
     'installable': True,
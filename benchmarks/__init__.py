@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+# Benchmarks del módulo. No se cargan con el addon: se ejecutan desde
+# `odoo-bin shell`. Suite completa con datos sintéticos y comparación
+# contra la línea base (ver run.py):
+#
+#   from odoo.addons.peruanita_purchase_order.benchmarks import run
+#   run.run(env, scale='small')
+#
+# Cada módulo bench_* también puede ejecutarse por separado con su run(env).
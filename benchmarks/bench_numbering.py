@@ -0,0 +1,77 @@
+"""
+Numeración de órdenes de compra con varios cursores en paralelo: mide el
+tiempo de creación y verifica que no se repitan números.
+
+Uso (odoo-bin shell):
+    from odoo.addons.peruanita_purchase_order.benchmarks import bench_numbering
+    bench_numbering.run(env, workers=4, orders_per_worker=200)
+
+Cada hilo revierte su transacción; solo el proveedor auxiliar se confirma
+y se elimina al terminar.
+"""
+import threading
+import time
+
+from odoo import api, SUPERUSER_ID
+
+from .common import report
+
+
+def _create_orders(registry, partner_id, count, batch_size, names, errors):
+    cr = registry.cursor()
+    try:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        for start in range(0, count, batch_size):
+            orders = env['purchase.order'].create([
+                {'partner_id': partner_id}
+                for _ in range(min(batch_size, count - start))
+            ])
+            names.extend(orders.mapped('name'))
+    except Exception as e:  # noqa: BLE001 - se reporta en los resultados
+        errors.append(repr(e))
+    finally:
+        cr.rollback()
+        cr.close()
+
+
+def bench(env, workers=4, orders_per_worker=200, batch_size=50):
+    registry = env.registry
+    with registry.cursor() as cr:
+        partner_id = api.Environment(cr, SUPERUSER_ID, {})['res.partner'].create({
+            'name': 'Proveedor Benchmark Numeración',
+        }).id
+    try:
+        names, errors = [], []
+        threads = [
+            threading.Thread(
+                target=_create_orders,
+                args=(registry, partner_id, orders_per_worker, batch_size, names, errors),
+            )
+            for _ in range(workers)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        with registry.cursor() as cr:
+            api.Environment(cr, SUPERUSER_ID, {})['res.partner'].browse(partner_id).unlink()
+    
+    duplicates = len(names) - len(set(names))
+    assert not duplicates, f'{duplicates} números de orden repetidos'
+    assert not errors, errors
+    return {
+        'parallel_create': {
+            'workers': workers,
+            'records': len(names),
+            'seconds': round(elapsed, 3),
+            'orders_per_second': round(len(names) / elapsed, 1) if elapsed else None,
+            'duplicates': duplicates,
+        },
+    }
+
+
+def run(env, workers=4, orders_per_worker=200, batch_size=50):
+    return report('numbering', bench(env, workers, orders_per_worker, batch_size))
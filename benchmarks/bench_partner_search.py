@@ -0,0 +1,66 @@
+"""
+Latencia del autocompletado de proveedores por RUC/DNI y por texto libre.
+
+Uso (odoo-bin shell):
+    from odoo.addons.peruanita_purchase_order.benchmarks import bench_partner_search
+    bench_partner_search.run(env, partners=200000)
+
+Si la base tiene menos de `partners` contactos se crean los faltantes con
+RUC aleatorio; la transacción se revierte al final.
+"""
+import random
+import time
+
+from .common import report
+
+BATCH_SIZE = 2000
+
+
+def _ensure_partners(env, count):
+    Partner = env['res.partner']
+    missing = count - Partner.search_count([])
+    rng = random.Random(42)
+    while missing > 0:
+        size = min(BATCH_SIZE, missing)
+        Partner.create([{
+            'name': f'Proveedor Benchmark {rng.randrange(10 ** 6):06d}',
+            'vat': f'20{rng.randrange(10 ** 9):09d}',
+        } for _ in range(size)])
+        env.flush_all()
+        env.invalidate_all()
+        missing -= size
+
+
+def _time_name_search(env, term, repeat):
+    Partner = env['res.partner']
+    start_queries = env.cr.sql_log_count
+    start = time.perf_counter()
+    for _ in range(repeat):
+        found = Partner.name_search(term, limit=8)
+    elapsed = time.perf_counter() - start
+    return {
+        'term': term,
+        'ms_per_search': round(elapsed / repeat * 1000, 3),
+        'queries_per_search': (env.cr.sql_log_count - start_queries) / repeat,
+        'results': len(found),
+    }
+
+
+def bench(env, repeat=20):
+    env.cr.execute("ANALYZE res_partner")
+    sample = env['res.partner'].search([('vat_normalized', '!=', False)], limit=1)
+    ruc = sample.vat_normalized or '20100000001'
+    return {
+        'ruc_exact': _time_name_search(env, ruc, repeat),
+        'ruc_prefix': _time_name_search(env, ruc[:5], repeat),
+        'free_text': _time_name_search(env, 'benchmark 12', repeat),
+    }
+
+
+def run(env, partners=200000, repeat=20):
+    try:
+        _ensure_partners(env, partners)
+        results = bench(env, repeat=repeat)
+    finally:
+        env.cr.rollback()
+    return report('partner_search', results)
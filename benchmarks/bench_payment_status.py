@@ -0,0 +1,83 @@
+"""
+Mide el recálculo de `payment_status` sobre las órdenes existentes y el
+costo de la conversión de monedas (debe mantenerse plano al aumentar la
+cantidad de monedas de los pagos).
+
+Uso (odoo-bin shell):
+    from odoo.addons.peruanita_purchase_order.benchmarks import bench_payment_status
+    bench_payment_status.run(env, limit=10000)
+    bench_payment_status.run_currencies(env, orders=500)
+
+La transacción se revierte al final; la base de datos no se modifica.
+"""
+from .common import measure, report
+
+
+def bench(env, limit=10000, per_record_sample=500):
+    orders = env['purchase.order'].search([], limit=limit, order='id')
+    results = {}
+    env.invalidate_all()
+    with measure(env, 'batched', results, records=len(orders)):
+        orders._recompute_payment_status()
+
+    # Mismo recálculo, una orden a la vez, sobre una muestra (costo sin agrupar)
+    sample = orders[:per_record_sample]
+    env.invalidate_all()
+    with measure(env, 'per_record_sample', results, records=len(sample)):
+        for order in sample:
+            order._recompute_payment_status()
+    return results
+
+
+def bench_currencies(env, orders=500, currency_counts=(1, 2, 4, 8)):
+    """Un pago directo por orden, repartidos entre N monedas"""
+    currencies = env['res.currency'].with_context(active_test=False).search([], limit=max(currency_counts))
+    currencies.active = True
+    partner = env['res.partner'].create({'name': 'Proveedor Benchmark Monedas'})
+    # Las líneas sin display_type requieren producto (constraint accountable_required_fields)
+    product = env['product.product'].create({'name': 'Servicio Benchmark', 'type': 'service'})
+    journal = env['account.journal'].search([
+        ('type', '=', 'bank'),
+        ('company_id', '=', env.company.id),
+    ], limit=1)
+    results = {}
+    for count in currency_counts:
+        purchase_orders = env['purchase.order'].create([{
+            'partner_id': partner.id,
+            'order_line': [(0, 0, {
+                'product_id': product.id,
+                'name': 'Servicio Benchmark',
+                'product_qty': 1,
+                'price_unit': 100.0,
+            })],
+        } for _ in range(orders)])
+        payments = env['account.payment'].create([{
+            'payment_type': 'outbound',
+            'partner_type': 'supplier',
+            'partner_id': partner.id,
+            'journal_id': journal.id,
+            'currency_id': currencies[index % count].id,
+            'amount': 50.0,
+            'purchase_id': order.id,
+        } for index, order in enumerate(purchase_orders)])
+        payments.action_post()
+        env.invalidate_all()
+        with measure(env, f'currencies_{count}', results, records=len(purchase_orders)):
+            purchase_orders._recompute_payment_status()
+    return results
+
+
+def run_currencies(env, orders=500, currency_counts=(1, 2, 4, 8)):
+    try:
+        results = bench_currencies(env, orders=orders, currency_counts=currency_counts)
+    finally:
+        env.cr.rollback()
+    return report('payment_status_currencies', results)
+
+
+def run(env, limit=10000, per_record_sample=500):
+    try:
+        results = bench(env, limit=limit, per_record_sample=per_record_sample)
+    finally:
+        env.cr.rollback()
+    return report('payment_status', results)
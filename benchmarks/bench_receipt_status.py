@@ -0,0 +1,47 @@
+"""
+Valida una recepción de 1.000 líneas y mide el costo del estado de recepción.
+
+Uso (odoo-bin shell):
+    from odoo.addons.peruanita_purchase_order.benchmarks import bench_receipt_status
+    bench_receipt_status.run(env, lines=1000)
+
+La transacción se revierte al final; la base de datos no se modifica.
+"""
+from .common import measure, report
+
+
+def bench(env, lines=1000):
+    results = {}
+    partner = env['res.partner'].create({'name': 'Proveedor Benchmark'})
+    product = env['product.product'].create({'name': 'Producto Benchmark', 'type': 'consu'})
+    order = env['purchase.order'].create({
+        'partner_id': partner.id,
+        'order_line': [
+            (0, 0, {'product_id': product.id, 'product_qty': 10, 'price_unit': 1.0})
+            for _ in range(lines)
+        ],
+    })
+    order.button_confirm()
+    picking = order.picking_ids
+    moves = picking.move_ids
+    
+    # Validación completa del picking
+    with measure(env, 'validate_picking', results, records=len(moves)):
+        for move in moves:
+            move.quantity = move.product_uom_qty
+        moves.picked = True
+        picking.with_context(skip_backorder=True).button_validate()
+    
+    env.invalidate_all()
+    results['receipt_status'] = order.receipt_status
+    results['receipt_qty'] = [order.receipt_qty_received, order.receipt_qty_ordered]
+    assert order.receipt_status == 'full', order.receipt_status
+    return results
+
+
+def run(env, lines=1000):
+    try:
+        results = bench(env, lines=lines)
+    finally:
+        env.cr.rollback()
+    return report('receipt_status', results)
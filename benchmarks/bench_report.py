@@ -0,0 +1,34 @@
+"""
+Impresión del PDF de órdenes de compra en lote (report.purchase.report_purchaseorder).
+
+Uso (odoo-bin shell):
+    from odoo.addons.peruanita_purchase_order.benchmarks import bench_report
+    bench_report.run(env, limit=400)
+"""
+import resource
+
+from .common import measure, report
+
+
+def bench(env, limit=400):
+    orders = env['purchase.order'].search([('state', 'in', ['purchase', 'done'])], limit=limit, order='id')
+    results = {}
+    env.invalidate_all()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with measure(env, 'batch_pdf', results, records=len(orders)):
+        content, _content_type = env['ir.actions.report']._render_qweb_pdf(
+            'purchase.report_purchaseorder', res_ids=orders.ids,
+        )
+    results['batch_pdf']['pdf_kb'] = len(content) // 1024
+    results['batch_pdf']['max_rss_growth_kb'] = (
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+    )
+    return results
+
+
+def run(env, limit=400):
+    try:
+        results = bench(env, limit=limit)
+    finally:
+        env.cr.rollback()
+    return report('report', results)
@@ -0,0 +1,76 @@
+"""
+Latencia de los filtros y agrupaciones de la vista de búsqueda de órdenes de
+compra y pagos, con y sin índices (se desactivan con enable_indexscan y
+enable_bitmapscan solo para la medición "sin índices").
+
+Uso (odoo-bin shell), idealmente sobre ~1M de órdenes generadas con datagen:
+    from odoo.addons.peruanita_purchase_order.benchmarks import bench_search_indexes
+    bench_search_indexes.run(env, repeat=5)
+"""
+import time
+
+from .common import report
+
+ORDER_FILTERS = {
+    'no_paid': [('state', 'in', ['purchase', 'done']), ('payment_status', '=', 'no_paid')],
+    'partial': [('state', 'in', ['purchase', 'done']), ('payment_status', '=', 'partial')],
+    'treasury_approved': [('treasury_approval', '=', True)],
+}
+ORDER_GROUPBYS = ['payment_status', 'requesting_department_id', 'supply_month']
+
+
+def _time(env, repeat, function):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return round((time.perf_counter() - start) / repeat * 1000, 2)
+
+
+def _measure(env, repeat):
+    PurchaseOrder = env['purchase.order']
+    AccountPayment = env['account.payment']
+    company_domain = [('company_id', 'in', env.companies.ids)]
+    timings = {}
+    for name, domain in ORDER_FILTERS.items():
+        timings[f'filter_{name}_ms'] = _time(env, repeat, lambda: PurchaseOrder.search(
+            company_domain + domain, limit=80,
+        ))
+    for groupby in ORDER_GROUPBYS:
+        timings[f'group_{groupby}_ms'] = _time(env, repeat, lambda: PurchaseOrder._read_group(
+            company_domain, [groupby], ['__count'],
+        ))
+    order_ids = PurchaseOrder.search([], limit=200).ids
+    timings['payments_by_order_ms'] = _time(env, repeat, lambda: AccountPayment.search([
+        ('purchase_id', 'in', order_ids),
+        ('state', 'in', ['paid', 'in_process']),
+        ('payment_type', '=', 'outbound'),
+    ]))
+    return timings
+
+
+def bench(env, repeat=5):
+    env.cr.execute("ANALYZE purchase_order")
+    env.cr.execute("ANALYZE account_payment")
+    results = {'with_indexes': _measure(env, repeat)}
+    env.cr.execute("SET LOCAL enable_indexscan = off")
+    env.cr.execute("SET LOCAL enable_bitmapscan = off")
+    env.cr.execute("SET LOCAL enable_indexonlyscan = off")
+    try:
+        results['without_indexes'] = _measure(env, repeat)
+    finally:
+        env.cr.execute("RESET enable_indexscan")
+        env.cr.execute("RESET enable_bitmapscan")
+        env.cr.execute("RESET enable_indexonlyscan")
+    results['counts'] = {
+        'orders': env['purchase.order'].search_count([]),
+        'payments': env['account.payment'].search_count([]),
+    }
+    return results
+
+
+def run(env, repeat=5):
+    try:
+        results = bench(env, repeat=repeat)
+    finally:
+        env.cr.rollback()
+    return report('search_indexes', results)
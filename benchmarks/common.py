@@ -0,0 +1,29 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+_logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def measure(env, label, results, records=0):
+    """Registra en `results[label]` las consultas SQL y el tiempo del bloque"""
+    env.flush_all()
+    cr = env.cr
+    start_queries = cr.sql_log_count
+    start = time.perf_counter()
+    yield
+    env.flush_all()
+    results[label] = {
+        'queries': cr.sql_log_count - start_queries,
+        'seconds': round(time.perf_counter() - start, 3),
+        'records': records,
+    }
+
+
+def report(name, results):
+    """Registra los resultados en formato JSON"""
+    payload = json.dumps({'benchmark': name, 'results': results}, indent=2, sort_keys=True)
+    _logger.info('benchmark %s: %s', name, payload)
+    return results
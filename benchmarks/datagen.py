@@ -0,0 +1,117 @@
+"""
+Generador de datos sintéticos para los benchmarks: proveedores con cuenta
+bancaria y contacto de compras, órdenes con líneas (parte confirmadas) y
+pagos salientes vinculados por purchase_id o por referencia en el memo.
+
+Los datos se crean por lotes con el ORM en la transacción actual; quien
+llama decide si confirma o revierte.
+"""
+import logging
+import random
+
+from odoo import fields
+
+_logger = logging.getLogger(__name__)
+
+SCALES = {
+    # Escala del test etiquetado purchase_perf (tests/test_performance.py)
+    'test': {'partners': 20, 'orders': 30, 'lines_per_order': 3, 'payments': 60},
+    'small': {'partners': 200, 'orders': 500, 'lines_per_order': 10, 'payments': 2000},
+    'medium': {'partners': 2000, 'orders': 5000, 'lines_per_order': 10, 'payments': 20000},
+    'large': {'partners': 20000, 'orders': 50000, 'lines_per_order': 10, 'payments': 200000},
+}
+
+
+def _batches(total, size):
+    for start in range(0, total, size):
+        yield range(start, min(start + size, total))
+
+
+def _release(env):
+    env.flush_all()
+    env.invalidate_all()
+
+
+def generate(env, partners, orders, lines_per_order, payments,
+             confirm_ratio=0.7, seed=42, batch_size=1000):
+    """Crea el conjunto de datos y retorna un resumen con los ids generados"""
+    rng = random.Random(seed)
+    Command = fields.Command
+    
+    banks = env['res.bank'].create([{'name': f'Banco Benchmark {i}'} for i in range(5)])
+    products = env['product.product'].create([
+        {'name': f'Producto Benchmark {i}', 'type': 'consu', 'standard_price': 10.0}
+        for i in range(50)
+    ])
+    
+    partner_ids = []
+    for batch in _batches(partners, batch_size):
+        partner_ids += env['res.partner'].create([{
+            'name': f'Proveedor Benchmark {i:06d}',
+            'vat': f'20{rng.randrange(10 ** 9):09d}',
+            'supplier_rank': 1,
+            'bank_ids': [Command.create({
+                'acc_number': f'BENCH-{i:06d}-{rng.randrange(10 ** 8):08d}',
+                'bank_id': rng.choice(banks).id,
+                'is_main_account': True,
+            })],
+            'child_ids': [Command.create({
+                'name': f'Compras Benchmark {i:06d}',
+                'function': 'Jefe de Compras',
+                'email': f'compras{i}@benchmark.example',
+            })],
+        } for i in batch]).ids
+        _release(env)
+    _logger.info('datagen: %s proveedores', len(partner_ids))
+    
+    order_ids = []
+    PurchaseOrder = env['purchase.order']
+    for batch in _batches(orders, batch_size):
+        created = PurchaseOrder.create([{
+            'partner_id': rng.choice(partner_ids),
+            'supply_month': rng.choice(PurchaseOrder._fields['supply_month'].get_values(env)),
+            'order_line': [Command.create({
+                'product_id': rng.choice(products).id,
+                'product_qty': rng.randint(1, 20),
+                'price_unit': round(rng.uniform(5, 500), 2),
+            }) for _ in range(lines_per_order)],
+        } for _ in batch])
+        to_confirm = created.filtered(lambda o: rng.random() < confirm_ratio)
+        to_confirm.button_confirm()
+        order_ids += created.ids
+        _release(env)
+    _logger.info('datagen: %s órdenes', len(order_ids))
+    
+    journal = env['account.journal'].search([
+        ('type', '=', 'bank'),
+        ('company_id', '=', env.company.id),
+    ], limit=1)
+    payment_ids = []
+    for batch in _batches(payments, batch_size):
+        orders_batch = PurchaseOrder.browse([rng.choice(order_ids) for _ in batch])
+        vals_list = []
+        for order in orders_batch:
+            vals = {
+                'payment_type': 'outbound',
+                'partner_type': 'supplier',
+                'partner_id': order.partner_id.id,
+                'amount': round(order.amount_total * rng.uniform(0.1, 0.6), 2) or 1.0,
+                'journal_id': journal.id,
+            }
+            # Mitad vinculados por purchase_id, mitad solo por referencia en el memo
+            if rng.random() < 0.5:
+                vals['purchase_id'] = order.id
+            else:
+                vals['memo'] = f'Pago O.C. {order.name}'
+            vals_list.append(vals)
+        created = env['account.payment'].create(vals_list)
+        created.action_post()
+        payment_ids += created.ids
+        _release(env)
+    _logger.info('datagen: %s pagos', len(payment_ids))
+    
+    return {
+        'partner_ids': partner_ids,
+        'order_ids': order_ids,
+        'payment_ids': payment_ids,
+    }
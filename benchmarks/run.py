@@ -0,0 +1,146 @@
+"""
+Suite completa: genera datos sintéticos a la escala indicada, ejecuta todos
+los benchmarks, guarda los resultados en JSON y los compara con la línea base.
+
+Uso (odoo-bin shell):
+    from odoo.addons.peruanita_purchase_order.benchmarks import run
+    run.run(env, scale='small')                          # falla si hay regresión
+    run.run(env, scale='small', update_baseline=True)    # regraba baseline.json
+    run.record_baselines(env)                            # todas las escalas
+
+baseline.json solo debe contener resultados medidos con update_baseline=True
+(consultas y tiempos), nunca valores escritos a mano. La escala 'test' se
+mide con las mismas opciones que tests/test_performance.py (COLLECT_OPTIONS).
+
+Las consultas SQL se comparan con tolerancia estricta y los tiempos con
+`time_tolerance` (relativo), porque dependen de la máquina. Una regresión
+termina el proceso con SystemExit(1), útil en scripts y CI. Los datos
+generados se revierten al final.
+"""
+import json
+import logging
+import os
+
+from . import (
+    bench_numbering,
+    bench_partner_search,
+    bench_payment_status,
+    bench_receipt_status,
+    bench_report,
+    bench_search_indexes,
+    datagen,
+)
+from .common import report
+
+_logger = logging.getLogger(__name__)
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+# Métricas de cantidad de consultas (comparación con tolerancia estricta)
+QUERY_METRICS = {'queries', 'queries_per_search'}
+# Opciones de collect() por escala; 'test' debe poder correr dentro de un
+# TransactionCase (sin numeración, que abre cursores propios) y en poco tiempo
+COLLECT_OPTIONS = {
+    'test': {'numbering': False, 'receipt_lines': 50, 'currency_orders': 50},
+}
+
+
+def _flatten(results, prefix=''):
+    """{'a': {'b': {'queries': 1}}} -> {'a.b.queries': 1} (solo valores numéricos)"""
+    flat = {}
+    for key, value in results.items():
+        path = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f'{path}.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(results, baseline, query_tolerance=0.1, time_tolerance=0.5):
+    """Retorna la lista de métricas que empeoraron respecto a la línea base"""
+    current = _flatten(results)
+    regressions = []
+    for path, expected in _flatten(baseline).items():
+        metric = path.rsplit('.', 1)[-1]
+        if metric in QUERY_METRICS:
+            tolerance, margin = query_tolerance, 1
+        elif metric == 'seconds':
+            tolerance, margin = time_tolerance, 0.05
+        else:
+            continue
+        value = current.get(path)
+        if value is None:
+            continue
+        if value > expected * (1 + tolerance) and value - expected > margin:
+            regressions.append({'metric': path, 'baseline': expected, 'current': value})
+    return regressions
+
+
+def load_baselines():
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH) as f:
+        return json.load(f)
+
+
+def collect(env, scale='small', numbering=True, receipt_lines=1000, currency_orders=500):
+    """
+    Genera los datos y ejecuta los benchmarks en la transacción actual, sin
+    revertirla (la usa el test etiquetado purchase_perf dentro de su transacción).
+    """
+    params = datagen.SCALES[scale]
+    results = {'scale': scale}
+    if numbering:
+        # Numeración primero: usa cursores propios y no debe esperar a los
+        # bloqueos de la transacción que genera los datos
+        results['numbering'] = bench_numbering.bench(env)
+    
+    datagen.generate(env, **params)
+    env.flush_all()
+    env.invalidate_all()
+    
+    results['payment_status'] = bench_payment_status.bench(env, limit=params['orders'])
+    results['payment_status_currencies'] = bench_payment_status.bench_currencies(env, orders=currency_orders)
+    results['receipt_status'] = bench_receipt_status.bench(env, lines=receipt_lines)
+    results['partner_search'] = bench_partner_search.bench(env)
+    results['report'] = bench_report.bench(env)
+    results['search_indexes'] = bench_search_indexes.bench(env)
+    return results
+
+
+def run(env, scale='small', output=None, update_baseline=False,
+        query_tolerance=0.1, time_tolerance=0.5):
+    try:
+        results = collect(env, scale, **COLLECT_OPTIONS.get(scale, {}))
+    finally:
+        env.cr.rollback()
+    
+    report('suite', results)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    
+    baselines = load_baselines()
+    if update_baseline:
+        baselines[scale] = results
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        _logger.info('benchmark: línea base "%s" actualizada en %s', scale, BASELINE_PATH)
+        return results
+    
+    if scale not in baselines:
+        _logger.warning('benchmark: sin línea base para la escala "%s"; use update_baseline=True', scale)
+        return results
+    
+    regressions = compare(results, baselines[scale], query_tolerance, time_tolerance)
+    if regressions:
+        _logger.error('benchmark: regresiones detectadas: %s', json.dumps(regressions, indent=2))
+        raise SystemExit(1)
+    _logger.info('benchmark: sin regresiones respecto a la línea base "%s"', scale)
+    return results
+
+
+def record_baselines(env, scales=('test', 'small', 'medium', 'large')):
+    """Mide cada escala y guarda sus resultados como línea base"""
+    for scale in scales:
+        run(env, scale=scale, update_baseline=True)
@@ -0,0 +1,145 @@
+import csv
+import io
+import logging
+import tempfile
+
+import xlsxwriter
+from werkzeug.exceptions import BadRequest, NotFound
+
+from odoo import api, fields, http
+from odoo.http import content_disposition, request
+from odoo.modules.registry import Registry
+
+_logger = logging.getLogger(__name__)
+
+# Órdenes leídas por consulta; solo un lote vive en memoria a la vez
+EXPORT_CHUNK_SIZE = 2000
+# Tamaño de los bloques enviados al cliente al transmitir el XLSX
+STREAM_BLOCK_SIZE = 64 * 1024
+
+ORDER_FIELDS = [
+    'name', 'date_order', 'partner_id', 'requesting_department_id', 'supply_month',
+    'currency_id', 'amount_total', 'payment_status', 'total_paid_amount', 'receipt_status',
+]
+
+HEADERS = [
+    'Orden', 'Fecha', 'Proveedor', 'RUC/DNI', 'Área Solicitante', 'Mes de Abastecimiento',
+    'Moneda', 'Total', 'Estado de Pago', 'Total Pagado', 'Estado de Recepción',
+    'Banco', 'Nro. Cuenta', 'CCI', 'Tipo de Cuenta',
+]
+
+
+class PurchaseOrderExport(http.Controller):
+
+    @http.route('/peruanita_purchase_order/export/<int:export_id>', type='http', auth='user')
+    def export_purchase_orders(self, export_id, **kwargs):
+        """
+        Exporta las órdenes de compra con estado de pago y recepción sin
+        cargarlas todas en memoria: las filas se leen por lotes (paginación
+        por id) con un cursor propio mientras se envía la respuesta. La
+        selección viene en la solicitud purchase.order.export, no en la URL.
+        """
+        export = request.env['purchase.order.export'].browse(export_id).exists()
+        if not export:
+            raise NotFound()
+        file_format = export.file_format
+        try:
+            domain = export._get_domain()
+        except ValueError:
+            raise BadRequest('Dominio inválido')
+        if not isinstance(domain, list):
+            raise BadRequest('Dominio inválido')
+        
+        PurchaseOrder = request.env['purchase.order']
+        PurchaseOrder.check_access('read')
+        PurchaseOrder.search(domain, limit=1)  # valida el dominio antes de empezar a transmitir
+        
+        rows = self._iter_rows(request.db, request.env.uid, dict(request.env.context), domain)
+        filename = f"ordenes_compra_{fields.Date.context_today(PurchaseOrder)}.{file_format}"
+        if file_format == 'csv':
+            body, content_type = self._stream_csv(rows), 'text/csv; charset=utf-8'
+        else:
+            body = self._stream_xlsx(rows)
+            content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        return request.make_response(body, headers=[
+            ('Content-Type', content_type),
+            ('Content-Disposition', content_disposition(filename)),
+        ])
+    
+    def _iter_rows(self, dbname, uid, context, domain):
+        """Genera las filas lote por lote con su propio cursor de base de datos"""
+        with Registry(dbname).cursor() as cr:
+            env = api.Environment(cr, uid, context)
+            PurchaseOrder = env['purchase.order']
+            ResPartner = env['res.partner']
+            labels = {
+                fname: dict(PurchaseOrder._fields[fname]._description_selection(env))
+                for fname in ('supply_month', 'payment_status', 'receipt_status')
+            }
+            last_id = 0
+            exported = 0
+            while True:
+                orders = PurchaseOrder.search_fetch(
+                    domain + [('id', '>', last_id)], ORDER_FIELDS,
+                    order='id', limit=EXPORT_CHUNK_SIZE,
+                )
+                if not orders:
+                    break
+                # Datos bancarios de todos los proveedores del lote en una consulta
+                supplier_infos = ResPartner._read_supplier_info(orders.partner_id.ids)
+                for order in orders:
+                    bank = ResPartner._supplier_bank_values(supplier_infos.get(order.partner_id.id), '')
+                    yield [
+                        order.name,
+                        fields.Datetime.context_timestamp(order, order.date_order).strftime('%d/%m/%Y')
+                        if order.date_order else '',
+                        order.partner_id.name or '',
+                        order.partner_id.vat or '',
+                        order.requesting_department_id.name or '',
+                        labels['supply_month'].get(order.supply_month, ''),
+                        order.currency_id.name or '',
+                        order.amount_total,
+                        labels['payment_status'].get(order.payment_status, ''),
+                        order.total_paid_amount,
+                        labels['receipt_status'].get(order.receipt_status, ''),
+                        bank['bank_name'],
+                        bank['account_number'],
+                        bank['cci_number'],
+                        bank['account_type'],
+                    ]
+                last_id = orders[-1].id
+                exported += len(orders)
+                env.invalidate_all()
+            _logger.info('Exportación de órdenes de compra: %s filas', exported)
+    
+    def _stream_csv(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(HEADERS)
+        yield ('\ufeff' + buffer.getvalue()).encode()
+        for row in rows:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(row)
+            yield buffer.getvalue().encode()
+    
+    def _stream_xlsx(self, rows):
+        """
+        El XLSX es un zip que solo puede cerrarse al final: las filas se
+        escriben en un archivo temporal (constant_memory) y luego se envía
+        el archivo por bloques.
+        """
+        with tempfile.TemporaryFile() as output:
+            workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+            worksheet = workbook.add_worksheet('Órdenes de Compra')
+            header_format = workbook.add_format({'bold': True})
+            amount_format = workbook.add_format({'num_format': '#,##0.00'})
+            worksheet.write_row(0, 0, HEADERS, header_format)
+            for row_index, row in enumerate(rows, start=1):
+                worksheet.write_row(row_index, 0, row)
+                worksheet.write_number(row_index, 7, row[7], amount_format)
+                worksheet.write_number(row_index, 9, row[9], amount_format)
+            workbook.close()
+            output.seek(0)
+            while block := output.read(STREAM_BLOCK_SIZE):
+                yield block
@@ -0,0 +1,30 @@
+import logging
+
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 5000
+
+
+def migrate(cr, version):
+    """Completa referenced_purchase_ids de los pagos existentes por bloques"""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    cr.execute("""
+        SELECT id
+          FROM account_payment
+         WHERE memo ~ '\\d{4}-\\d+'
+            OR payment_reference ~ '\\d{4}-\\d+'
+      ORDER BY id
+    """)
+    payment_ids = [row[0] for row in cr.fetchall()]
+    AccountPayment = env['account.payment']
+    for start in range(0, len(payment_ids), CHUNK_SIZE):
+        chunk = AccountPayment.browse(payment_ids[start:start + CHUNK_SIZE])
+        chunk._update_referenced_purchase_ids()
+        env.flush_all()
+        env.invalidate_all()
+        _logger.info(
+            'referenced_purchase_ids: %s/%s pagos procesados',
+            min(start + CHUNK_SIZE, len(payment_ids)), len(payment_ids),
+        )
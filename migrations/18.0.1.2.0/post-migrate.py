@@ -0,0 +1,8 @@
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Continúa la numeración YYYY-NNNN existente en la secuencia global"""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    sequence = env.ref('peruanita_purchase_order.seq_custom_purchase_order')
+    env['purchase.order']._seed_custom_purchase_sequence(sequence)
@@ -0,0 +1,38 @@
+import logging
+from datetime import datetime
+
+from odoo.tools.sql import column_exists
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Convierte el texto de fechas de cancelación en registros de fecha"""
+    if not column_exists(cr, 'purchase_order', 'cancellation_dates'):
+        return
+    cr.execute("""
+        SELECT id, cancellation_dates
+          FROM purchase_order
+         WHERE COALESCE(cancellation_dates, '') != ''
+    """)
+    order_ids, dates = [], []
+    for order_id, text in cr.fetchall():
+        for token in text.split(','):
+            token = token.strip()
+            if not token:
+                continue
+            try:
+                dates.append(datetime.strptime(token, '%d/%m/%Y').date())
+            except ValueError:
+                _logger.warning('O.C. %s: fecha de cancelación no reconocida %r', order_id, token)
+                continue
+            order_ids.append(order_id)
+    if order_ids:
+        cr.execute("""
+            INSERT INTO purchase_order_cancellation_date
+                        (purchase_id, date, create_uid, create_date, write_uid, write_date)
+                 SELECT purchase_id, date, 1, now() AT TIME ZONE 'UTC', 1, now() AT TIME ZONE 'UTC'
+                   FROM unnest(%s::int[], %s::date[]) AS t(purchase_id, date)
+            ON CONFLICT DO NOTHING
+        """, [order_ids, dates])
+    cr.execute("ALTER TABLE purchase_order DROP COLUMN cancellation_dates")
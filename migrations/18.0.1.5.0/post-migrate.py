@@ -0,0 +1,3 @@
+def migrate(cr, version):
+    """formatted_date ya no se almacena: se calcula al imprimir el reporte"""
+    cr.execute("ALTER TABLE purchase_order DROP COLUMN IF EXISTS formatted_date")
@@ -1,4 +1,13 @@
+from . import res_company
 from . import res_partner_bank
 from . import res_partner
 from . import purchase_order
-from . import account_payment
\ No newline at end of file
+from . import purchase_order_cancellation_date
+from . import purchase_order_report_cache
+from . import account_move
+from . import account_payment
+from . import purchase_payment_status_queue
+from . import purchase_supplier_metrics_queue
+from . import ir_actions_report
+from . import purchase_perf_stat
+from . import purchase_payable_report
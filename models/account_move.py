@@ -0,0 +1,74 @@
+from collections import defaultdict
+
+from odoo import api, fields, models
+from odoo.tools import sql
+
+
+class AccountMove(models.Model):
+    _inherit = 'account.move'
+    
+    # No almacenado: vive en la caché del entorno, que se vacía con
+    # invalidate_all() y al revertir la transacción o un savepoint
+    purchase_reconciled_payment_ids = fields.Many2many(
+        'account.payment',
+        string='Pagos Conciliados',
+        compute='_compute_purchase_reconciled_payment_ids'
+    )
+    
+    @api.depends('line_ids.matched_debit_ids', 'line_ids.matched_credit_ids')
+    def _compute_purchase_reconciled_payment_ids(self):
+        """
+        Pagos conciliados contra las líneas por pagar de cada asiento,
+        resueltos para todos los asientos en una sola consulta sobre
+        account_partial_reconcile
+        """
+        payment_ids_by_move = defaultdict(list)
+        move_ids = [move_id for move_id in self._origin.ids if move_id]
+        if move_ids:
+            for model, fnames in (
+                ('account.partial.reconcile', ['debit_move_id', 'credit_move_id']),
+                ('account.move.line', ['move_id', 'account_id']),
+                ('account.payment', ['move_id']),
+            ):
+                self.env[model].flush_model(fnames)
+            self.env.cr.execute("""
+                SELECT bill_line.move_id, ap.id
+                  FROM account_move_line bill_line
+                  JOIN account_account acc ON acc.id = bill_line.account_id
+                  JOIN account_partial_reconcile apr ON apr.credit_move_id = bill_line.id
+                  JOIN account_move_line counterpart ON counterpart.id = apr.debit_move_id
+                  JOIN account_payment ap ON ap.move_id = counterpart.move_id
+                 WHERE bill_line.move_id = ANY(%(move_ids)s)
+                   AND acc.account_type = 'liability_payable'
+             UNION
+                SELECT bill_line.move_id, ap.id
+                  FROM account_move_line bill_line
+                  JOIN account_account acc ON acc.id = bill_line.account_id
+                  JOIN account_partial_reconcile apr ON apr.debit_move_id = bill_line.id
+                  JOIN account_move_line counterpart ON counterpart.id = apr.credit_move_id
+                  JOIN account_payment ap ON ap.move_id = counterpart.move_id
+                 WHERE bill_line.move_id = ANY(%(move_ids)s)
+                   AND acc.account_type = 'liability_payable'
+            """, {'move_ids': move_ids})
+            for move_id, payment_id in self.env.cr.fetchall():
+                payment_ids_by_move[move_id].append(payment_id)
+        for move in self:
+            move.purchase_reconciled_payment_ids = self.env['account.payment'].browse(
+                payment_ids_by_move.get(move._origin.id, [])
+            )
+    
+    def _get_reconciled_payment_map(self):
+        """Retorna {move_id: set(payment_ids)} con los pagos conciliados de cada asiento"""
+        return {move.id: set(move.purchase_reconciled_payment_ids.ids) for move in self._origin}
+
+
+class AccountMoveLine(models.Model):
+    _inherit = 'account.move.line'
+    
+    def init(self):
+        super().init()
+        # Marca de agua de la conciliación programada del estado de pago:
+        # detecta líneas conciliadas o desconciliadas desde la última ejecución
+        sql.create_index(
+            self.env.cr, 'account_move_line_write_date_index', self._table, ['write_date'],
+        )
@@ -1,4 +1,16 @@
+import re
+
 from odoo import models, fields, api
+from odoo.tools import sql
+
+# Números de orden de compra (YYYY-NNNN) mencionados en memo o referencias
+PURCHASE_REF_PATTERN = re.compile(r'(?<![\w-])(\d{4}-\d+)(?![\w-])')
+
+# Campos del pago que intervienen en el estado de pago de la orden
+PAYMENT_STATUS_FIELDS = {
+    'amount', 'state', 'partner_id', 'purchase_id', 'memo', 'payment_reference', 'payment_type',
+    'currency_id', 'date',
+}
 
 
 class AccountPayment(models.Model):
@@ -19,6 +31,19 @@ class AccountPayment(models.Model):
         readonly=True
     )
     
+    # Órdenes de compra mencionadas en el memo o payment_reference
+    referenced_purchase_ids = fields.Many2many(
+        'purchase.order',
+        'account_payment_purchase_order_ref_rel',
+        'payment_id',
+        'purchase_id',
+        string='O.C. Referenciadas',
+        readonly=True,
+        copy=False,
+        help='Órdenes de compra cuyo número (YYYY-NNNN) aparece en el memo o '
+             'en la referencia del pago.'
+    )
+    
     @api.onchange('purchase_id')
     def _onchange_purchase_id(self):
         """
@@ -35,30 +60,78 @@ class AccountPayment(models.Model):
     def create(self, vals_list):
         """Recalcular estado de pago de la orden cuando se crea un pago"""
         payments = super().create(vals_list)
+        payments._update_referenced_purchase_ids()
         # Buscar órdenes de compra que necesitan recalcular
-        purchase_orders = payments.mapped('purchase_id')
-        if purchase_orders:
-            purchase_orders._compute_payment_status()
+        payments._get_payment_status_orders()._schedule_payment_status_recompute()
         return payments
     
     def write(self, vals):
         """Recalcular estado de pago de la orden cuando se modifica un pago"""
-        # Guardar órdenes antes del cambio
-        old_purchase_orders = self.mapped('purchase_id')
+        # Cambios que no afectan el estado de pago (chatter, etc.) no recalculan
+        status_fields = [fname for fname in PAYMENT_STATUS_FIELDS if fname in vals]
+        if not status_fields:
+            return super().write(vals)
+        # Valores y órdenes antes del cambio
+        old_values = {payment.id: [payment[fname] for fname in status_fields] for payment in self}
+        old_purchase_orders = {payment.id: payment._get_payment_status_orders() for payment in self}
         result = super().write(vals)
-        # Buscar órdenes después del cambio
-        new_purchase_orders = self.mapped('purchase_id')
+        # Solo los pagos cuyos valores cambiaron realmente
+        changed = self.filtered(
+            lambda payment: [payment[fname] for fname in status_fields] != old_values[payment.id]
+        )
+        if not changed:
+            return result
+        if 'memo' in vals or 'payment_reference' in vals:
+            changed._update_referenced_purchase_ids()
         # Recalcular ambas (la antigua y la nueva si cambió)
-        all_orders = old_purchase_orders | new_purchase_orders
-        if all_orders:
-            all_orders._compute_payment_status()
+        purchase_orders = changed._get_payment_status_orders().union(
+            *(old_purchase_orders[payment.id] for payment in changed)
+        )
+        purchase_orders.exists()._schedule_payment_status_recompute()
         return result
     
     def unlink(self):
         """Recalcular estado de pago de la orden cuando se elimina un pago"""
-        purchase_orders = self.mapped('purchase_id')
+        purchase_orders = self._get_payment_status_orders()
         result = super().unlink()
-        if purchase_orders:
-            purchase_orders._compute_payment_status()
+        purchase_orders.exists()._schedule_payment_status_recompute()
         return result
-
+    
+    def _get_payment_status_orders(self):
+        """Órdenes cuyo estado de pago depende de estos pagos (directas o por referencia)"""
+        return self.purchase_id | self.referenced_purchase_ids
+    
+    @api.model
+    def _extract_purchase_references(self, *texts):
+        """Retorna los números de orden (YYYY-NNNN) presentes en los textos"""
+        references = set()
+        for text in texts:
+            if text:
+                references.update(PURCHASE_REF_PATTERN.findall(text))
+        return references
+    
+    def _update_referenced_purchase_ids(self):
+        """Vincula cada pago con las órdenes mencionadas en memo o payment_reference"""
+        references_by_payment = {
+            payment: self._extract_purchase_references(payment.memo, payment.payment_reference)
+            for payment in self
+        }
+        all_references = set().union(*references_by_payment.values())
+        orders_by_name = {}
+        if all_references:
+            orders = self.env['purchase.order'].sudo().search([('name', 'in', list(all_references))])
+            for order in orders:
+                orders_by_name.setdefault(order.name, []).append(order.id)
+        for payment, references in references_by_payment.items():
+            order_ids = [oid for ref in references for oid in orders_by_name.get(ref, [])]
+            if set(order_ids) != set(payment.referenced_purchase_ids.ids):
+                payment.referenced_purchase_ids = [fields.Command.set(order_ids)]
+    
+    def init(self):
+        super().init()
+        # Pagos directos de una orden (estado de pago, búsqueda por O.C.);
+        # reemplaza el índice simple sobre purchase_id
+        sql.create_index(
+            self.env.cr, 'account_payment_purchase_state_type_index', self._table,
+            ['purchase_id', 'state', 'payment_type'], where='purchase_id IS NOT NULL',
+        )
@@ -0,0 +1,80 @@
+import io
+import tempfile
+from contextlib import ExitStack
+
+from odoo import models
+from odoo.tools import split_every
+from odoo.tools.pdf import PdfFileReader, PdfFileWriter, merge_pdf
+
+from .purchase_perf_stat import perf_hook
+
+PURCHASE_ORDER_REPORT = 'purchase.report_purchaseorder'
+CHUNK_SIZE_PARAM = 'peruanita_purchase_order.report_chunk_size'
+# Claves de `data` que no cambian el contenido del PDF (/report/download
+# siempre envía el contexto)
+REPORT_DATA_IGNORED_KEYS = {'context', 'report_type'}
+
+
+class IrActionsReport(models.Model):
+    _inherit = 'ir.actions.report'
+
+    def _render_qweb_pdf(self, report_ref, res_ids=None, data=None):
+        """Las órdenes de compra se imprimen con _render_purchase_order_pdf (perfilado y por bloques)"""
+        report = self._get_report(report_ref)
+        if (report.report_name != PURCHASE_ORDER_REPORT or not res_ids
+                or self.env.context.get('purchase_report_chunk')):
+            return super()._render_qweb_pdf(report_ref, res_ids=res_ids, data=data)
+        
+        if isinstance(res_ids, int):
+            res_ids = [res_ids]
+        return self._render_purchase_order_pdf(report_ref, res_ids, data)
+    
+    @perf_hook('ir.actions.report._render_purchase_order_pdf',
+               record_count=lambda self, args, kwargs: len(args[1]))
+    def _render_purchase_order_pdf(self, report_ref, res_ids, data):
+        """
+        Renderiza las órdenes de compra, por bloques si son muchas. Los PDF en
+        caché vigentes se entregan sin volver a renderizar; una orden sin caché
+        se renderiza y se guarda para las siguientes impresiones o correos.
+        """
+        use_cache = not set(data or {}) - REPORT_DATA_IGNORED_KEYS
+        if use_cache and not self.env.context.get('purchase_report_no_cache'):
+            orders = self.env['purchase.order'].browse(res_ids)
+            cached = orders._get_cached_report_pdfs()
+            if len(cached) == len(res_ids):
+                if len(res_ids) == 1:
+                    return cached[res_ids[0]], 'pdf'
+                return merge_pdf([cached[res_id] for res_id in res_ids]), 'pdf'
+            if len(res_ids) == 1:
+                content, content_type = super()._render_qweb_pdf(report_ref, res_ids=res_ids, data=data)
+                orders._store_report_cache(content)
+                return content, content_type
+        
+        chunk_size = int(self.env['ir.config_parameter'].sudo().get_param(CHUNK_SIZE_PARAM, 50))
+        if len(res_ids) <= chunk_size:
+            return super()._render_qweb_pdf(report_ref, res_ids=res_ids, data=data)
+        return self._render_purchase_order_pdf_chunks(report_ref, res_ids, data, chunk_size), 'pdf'
+    
+    def _render_purchase_order_pdf_chunks(self, report_ref, res_ids, data, chunk_size):
+        """
+        Renderiza cada bloque por separado, lo guarda en un archivo temporal y
+        une las páginas en un único PDF; la memoria no crece con el tamaño del lote.
+        """
+        chunk_report = self.with_context(purchase_report_chunk=True)
+        writer = PdfFileWriter()
+        with ExitStack() as stack:
+            for chunk_ids in split_every(chunk_size, res_ids, list):
+                content, _content_type = super(IrActionsReport, chunk_report)._render_qweb_pdf(
+                    report_ref, res_ids=chunk_ids, data=data
+                )
+                chunk_file = stack.enter_context(tempfile.TemporaryFile())
+                chunk_file.write(content)
+                del content
+                reader = PdfFileReader(chunk_file, strict=False)
+                for page in range(reader.getNumPages()):
+                    writer.addPage(reader.getPage(page))
+                # Liberar los registros del bloque ya impreso
+                self.env.invalidate_all()
+            with io.BytesIO() as buffer:
+                writer.write(buffer)
+                return buffer.getvalue()
@@ -1,5 +1,52 @@
+import base64
+import functools
+import hashlib
+import json
+import logging
+from collections import defaultdict
+from datetime import date
+
+import pytz
+
 from odoo import models, fields, api
-from datetime import datetime
+from odoo.tools import sql
+
+from .purchase_perf_stat import perf_hook
+
+_logger = logging.getLogger(__name__)
+
+CUSTOM_PURCHASE_SEQUENCE_CODE = 'purchase.order.custom'
+REPORT_DATE_FORMAT = '%d/%m/%y'
+# Zona horaria de las fechas del reporte si la compañía no tiene una
+REPORT_DEFAULT_TZ = 'America/Lima'
+# Contexto para crear órdenes en lote sin calcular estado de pago ni de
+# recepción; quien lo usa llama luego a _recompute_status_fields()
+DEFER_STATUS_CONTEXT = 'purchase_defer_status_compute'
+# Campos calculados desde los pagos y facturas de la orden
+PAYMENT_STATUS_ORDER_FIELDS = [
+    'direct_payment_count', 'direct_payment_amount', 'matched_payment_amount',
+    'total_paid_amount', 'payment_percentage', 'payment_status',
+]
+DEFERRED_STATUS_FIELDS = [
+    'receipt_qty_ordered', 'receipt_qty_received', 'receipt_status',
+] + PAYMENT_STATUS_ORDER_FIELDS
+# Parámetro del cliente web: cantidad máxima de active_ids enviados a una acción
+ACTIVE_IDS_LIMIT_PARAM = 'web.active_ids_limit'
+
+
+@functools.lru_cache(maxsize=32)
+def _get_report_date_formatter(tz_name):
+    """Formateador de fechas del reporte, uno por zona horaria (compartido entre registros)"""
+    try:
+        timezone = pytz.timezone(tz_name or 'UTC')
+    except pytz.UnknownTimeZoneError:
+        timezone = pytz.utc
+    
+    def format_date(value):
+        if not value:
+            return ''
+        return pytz.utc.localize(value).astimezone(timezone).strftime(REPORT_DATE_FORMAT)
+    return format_date
 
 
 class PurchaseOrder(models.Model):
@@ -54,8 +101,17 @@ class PurchaseOrder(models.Model):
     )
     
     # Fechas de cancelación
+    cancellation_date_ids = fields.One2many(
+        'purchase.order.cancellation.date',
+        'purchase_id',
+        string='Fechas de Cancelación',
+        copy=False
+    )
+    
+    # Fechas de cancelación como texto (formulario y reporte)
     cancellation_dates = fields.Text(
-        string='Fecha(s) de cancelación'
+        string='Fecha(s) de cancelación',
+        compute='_compute_cancellation_dates'
     )
     
     # Estado de pago (computado automáticamente)
@@ -79,10 +135,43 @@ class PurchaseOrder(models.Model):
         store=True
     )
     
+    # Pagos vinculados a la orden mediante el campo purchase_id del pago
+    direct_payment_ids = fields.One2many(
+        'account.payment',
+        'purchase_id',
+        string='Pagos Directos'
+    )
+    
+    # Pagos que mencionan la orden en el memo o payment_reference
+    referencing_payment_ids = fields.Many2many(
+        'account.payment',
+        'account_payment_purchase_order_ref_rel',
+        'purchase_id',
+        'payment_id',
+        string='Pagos por Referencia',
+        readonly=True,
+        copy=False
+    )
+    
     # Contador de pagos directos para smart button
     direct_payment_count = fields.Integer(
         string='Cantidad de Pagos Directos',
-        compute='_compute_direct_payment_count'
+        compute='_compute_payment_aggregates',
+        store=True
+    )
+    
+    direct_payment_amount = fields.Monetary(
+        string='Total Pagos Directos',
+        compute='_compute_payment_aggregates',
+        store=True,
+        currency_field='currency_id'
+    )
+    
+    matched_payment_amount = fields.Monetary(
+        string='Total Pagos por Referencia',
+        compute='_compute_payment_aggregates',
+        store=True,
+        currency_field='currency_id'
     )
     
     receipt_status = fields.Selection([
@@ -91,41 +180,83 @@ class PurchaseOrder(models.Model):
         ('full', 'Totalmente Recibido'),
     ], string='Estado de Recepción', compute='_compute_receipt_status', store=True)
     
-    @api.depends('order_line.qty_received', 'order_line.product_qty')
+    # Totales de recepción en la unidad de medida de cada producto
+    receipt_qty_ordered = fields.Float(
+        string='Cantidad Pedida (Recepción)',
+        compute='_compute_receipt_totals',
+        store=True,
+        digits='Product Unit of Measure'
+    )
+    
+    receipt_qty_received = fields.Float(
+        string='Cantidad Recibida (Recepción)',
+        compute='_compute_receipt_totals',
+        store=True,
+        digits='Product Unit of Measure'
+    )
+    
+    @api.depends('order_line.receipt_kind', 'order_line.product_uom_qty',
+                 'order_line.qty_received_product_uom')
+    def _compute_receipt_totals(self):
+        """
+        Suma lo pedido y lo recibido de las líneas de bienes o, si la orden
+        solo tiene servicios, de las líneas de servicio. Para órdenes guardadas
+        la suma se hace en base de datos con una consulta agrupada para todo el lote.
+        """
+        if self.env.context.get(DEFER_STATUS_CONTEXT):
+            self.update({'receipt_qty_ordered': 0.0, 'receipt_qty_received': 0.0})
+            return
+        totals = defaultdict(dict)
+        stored_orders = self.filtered('id')
+        if stored_orders:
+            for order, kind, qty_ordered, qty_received in self.env['purchase.order.line']._read_group(
+                [('order_id', 'in', stored_orders.ids), ('receipt_kind', '!=', False)],
+                ['order_id', 'receipt_kind'],
+                ['product_uom_qty:sum', 'qty_received_product_uom:sum'],
+            ):
+                totals[order.id][kind] = (qty_ordered, qty_received)
+        # Órdenes en edición (onchange): sumar las líneas en memoria
+        for order in self - stored_orders:
+            for line in order.order_line.filtered('receipt_kind'):
+                qty_ordered, qty_received = totals[order.id].get(line.receipt_kind, (0.0, 0.0))
+                totals[order.id][line.receipt_kind] = (
+                    qty_ordered + line.product_uom_qty,
+                    qty_received + line.qty_received_product_uom,
+                )
+        
+        for order in self:
+            by_kind = totals[order.id]
+            qty_ordered, qty_received = by_kind.get('goods') or by_kind.get('service') or (0.0, 0.0)
+            order.receipt_qty_ordered = qty_ordered
+            order.receipt_qty_received = qty_received
+    
+    @api.depends('state', 'receipt_qty_ordered', 'receipt_qty_received')
     def _compute_receipt_status(self):
         for order in self:
-            if order.state not in ('purchase', 'done'):
+            if order.state not in ('purchase', 'done') or order.receipt_qty_received == 0:
                 order.receipt_status = 'no'
-                continue
-                
-            # Verificar si hay líneas de producto (no servicios)
-            product_lines = order.order_line.filtered(
-                lambda l: l.product_id.type in ['product', 'consu']
-            )
-            
-            if not product_lines:
-                order.receipt_status = 'no'
-                continue
-            
-            total_ordered = sum(product_lines.mapped('product_qty'))
-            total_received = sum(product_lines.mapped('qty_received'))
-            
-            if total_received == 0:
-                order.receipt_status = 'no'
-            elif total_received >= total_ordered:
+            elif order.receipt_qty_received >= order.receipt_qty_ordered:
                 order.receipt_status = 'full'
             else:
                 order.receipt_status = 'partial'
     
     @api.depends('invoice_ids', 'invoice_ids.payment_state', 'invoice_ids.amount_total', 
-                 'invoice_ids.amount_residual', 'amount_total', 'partner_id')
+                 'invoice_ids.amount_residual', 'invoice_ids.currency_id',
+                 'amount_total', 'currency_id', 'partner_id')
+    @perf_hook('purchase.order._compute_payment_status')
     def _compute_payment_status(self):
         """
         Calcula el estado de pago de la orden de compra considerando:
         1. Pagos vinculados a facturas de la orden (facturas confirmadas)
         2. Pagos directos sin factura (account.payment vinculados a la orden)
+        3. Pagos que mencionan la orden en el memo o payment_reference
+
+        El cálculo se hace en lote para todo el recordset (ver _get_paid_amounts).
         """
-        AccountPayment = self.env['account.payment']
+        if self.env.context.get(DEFER_STATUS_CONTEXT):
+            self.update({'total_paid_amount': 0.0, 'payment_percentage': 0.0, 'payment_status': 'no_paid'})
+            return
+        paid_amounts = self._get_paid_amounts()
         
         for order in self:
             if order.amount_total == 0:
@@ -134,78 +265,7 @@ class PurchaseOrder(models.Model):
                 order.payment_status = 'no_paid'
                 continue
             
-            total_paid = 0.0
-            counted_payment_ids = set()
-            
-            # 1. Sumar pagos de facturas vinculadas a esta orden de compra
-            vendor_bills = order.invoice_ids.filtered(
-                lambda inv: inv.move_type == 'in_invoice' and inv.state == 'posted'
-            )
-            
-            for bill in vendor_bills:
-                # Calcular el monto pagado de esta factura
-                # amount_residual es lo que falta por pagar
-                # entonces lo pagado es: total - residual
-                paid_amount = bill.amount_total - bill.amount_residual
-                total_paid += paid_amount
-                
-                # Guardar IDs de pagos ya contados para evitar duplicados
-                # Buscar los movimientos de línea de cuenta relacionados
-                if bill.line_ids:
-                    reconciled_lines = bill.line_ids.filtered(lambda l: l.account_id.account_type in ['liability_payable'])
-                    for line in reconciled_lines:
-                        if line.matched_debit_ids or line.matched_credit_ids:
-                            # Obtener los pagos asociados a estas líneas reconciliadas
-                            payment_lines = line.matched_debit_ids.mapped('debit_move_id') | line.matched_credit_ids.mapped('credit_move_id')
-                            payments = AccountPayment.search([('move_id', 'in', payment_lines.mapped('move_id').ids)])
-                            counted_payment_ids.update(payments.ids)
-            
-            # 2. Buscar pagos directos vinculados a esta orden (sin factura o con factura en borrador)
-            # Solo si el modelo tiene el campo purchase_id (que acabamos de agregar)
-            direct_payments = AccountPayment.search([
-                ('id', 'not in', list(counted_payment_ids)),
-                ('purchase_id', '=', order.id),
-                ('state', 'in', ['paid', 'in_process']),
-                ('payment_type', '=', 'outbound'),
-            ])
-            
-            for payment in direct_payments:
-                # Verificar que no esté vinculado a una factura confirmada de esta orden
-                is_linked_to_posted_bill = False
-                if hasattr(payment, 'reconciled_invoice_ids'):
-                    for invoice in payment.reconciled_invoice_ids:
-                        if invoice.state == 'posted' and invoice in vendor_bills:
-                            is_linked_to_posted_bill = True
-                            break
-                
-                if not is_linked_to_posted_bill:
-                    total_paid += payment.amount
-                    counted_payment_ids.add(payment.id)
-            
-            # 3. Buscar pagos que mencionen esta orden en el memo o payment_reference
-            # (esto cubre casos donde se registró el pago manualmente sin usar el campo purchase_id)
-            if order.name:
-                payments_by_ref = AccountPayment.search([
-                    ('id', 'not in', list(counted_payment_ids)),
-                    ('partner_id', '=', order.partner_id.id),
-                    ('state', 'in', ['paid', 'in_process']),
-                    ('payment_type', '=', 'outbound'),
-                    '|',
-                    ('memo', 'ilike', order.name),
-                    ('payment_reference', 'ilike', order.name)
-                ])
-                
-                for payment in payments_by_ref:
-                    # Verificar que no esté vinculado a facturas de esta orden
-                    is_linked = False
-                    if hasattr(payment, 'reconciled_invoice_ids'):
-                        for invoice in payment.reconciled_invoice_ids:
-                            if invoice.state == 'posted' and invoice in vendor_bills:
-                                is_linked = True
-                                break
-                    
-                    if not is_linked:
-                        total_paid += payment.amount
+            total_paid = paid_amounts.get(order.id, 0.0)
             
             # Calcular porcentaje y determinar estado
             order.total_paid_amount = total_paid
@@ -219,12 +279,238 @@ class PurchaseOrder(models.Model):
             else:
                 order.payment_status = 'no_paid'
     
-    def _compute_direct_payment_count(self):
-        """Cuenta los pagos directamente vinculados a esta orden de compra"""
+    def _schedule_payment_status_recompute(self):
+        """Recalcula el estado de pago ahora o lo encola si el modo diferido está activo"""
+        if not self:
+            return
+        queue = self.env['purchase.payment.status.queue'].sudo()
+        if queue._is_deferred():
+            queue._enqueue(self)
+        else:
+            self._recompute_payment_status()
+    
+    def _get_paid_amounts(self):
+        """
+        Retorna {order.id: monto pagado} en la moneda de cada orden para todo el recordset.
+
+        Usa un número fijo de consultas agrupadas (facturas, conciliaciones,
+        pagos directos y pagos por referencia) en lugar de buscar orden por orden.
+        Los montos en otra moneda se convierten a la fecha de la factura o del
+        pago, con una tasa por (moneda, compañía, fecha) para todo el recordset.
+        """
+        AccountPayment = self.env['account.payment']
+        orders = self.filtered(lambda o: o.amount_total != 0)
+        # Las órdenes sin facturas ni pagos (la mayoría de las abiertas) no
+        # pasan por las consultas siguientes: quedan en 0 (no pagado)
+        with_payment_ids = orders._get_ids_with_payment_inputs()
+        orders = orders.filtered(lambda o: o._origin.id in with_payment_ids)
+        if not orders:
+            return {}
+        
+        # 1. Facturas confirmadas de cada orden
+        bills_by_order = {
+            order.id: order.invoice_ids.filtered(
+                lambda inv: inv.move_type == 'in_invoice' and inv.state == 'posted'
+            )
+            for order in orders
+        }
+        all_bills = self.env['account.move'].union(*bills_by_order.values())
+        
+        # Pagos conciliados con cada factura (una consulta, en la caché del entorno)
+        payment_ids_by_bill = all_bills._get_reconciled_payment_map()
+        
+        # 2. Pagos directos vinculados a las órdenes (campo purchase_id)
+        direct_payments_by_order = defaultdict(list)
+        for payment in AccountPayment.search([
+            ('purchase_id', 'in', orders._origin.ids),
+            ('state', 'in', ['paid', 'in_process']),
+            ('payment_type', '=', 'outbound'),
+        ]):
+            direct_payments_by_order[payment.purchase_id.id].append(payment)
+        
+        # 3. Pagos que mencionan la orden en el memo o payment_reference
+        # (ver account.payment.referenced_purchase_ids, relación indexada)
+        ref_payments_by_order = defaultdict(list)
+        for payment in AccountPayment.search([
+            ('referenced_purchase_ids', 'in', orders._origin.ids),
+            ('partner_id', 'in', orders.partner_id.ids),
+            ('state', 'in', ['paid', 'in_process']),
+            ('payment_type', '=', 'outbound'),
+        ]):
+            for order_id in payment.referenced_purchase_ids.ids:
+                ref_payments_by_order[order_id].append(payment)
+        
+        to_order_currency = self._get_order_currency_converter()
+        
+        paid_amounts = {}
+        for order in orders:
+            vendor_bills = bills_by_order[order.id]
+            total_paid = 0.0
+            counted_payment_ids = set()
+            
+            for bill in vendor_bills:
+                # Lo pagado de la factura es: total - residual (en la moneda de la factura)
+                total_paid += to_order_currency(
+                    bill.amount_total - bill.amount_residual, bill.currency_id, order,
+                    bill.invoice_date or bill.date,
+                )
+                # Los pagos conciliados con la factura ya están incluidos en lo pagado
+                counted_payment_ids.update(payment_ids_by_bill.get(bill.id, ()))
+            
+            for payment in direct_payments_by_order.get(order._origin.id, ()):
+                if payment.id in counted_payment_ids:
+                    continue
+                total_paid += to_order_currency(payment.amount, payment.currency_id, order, payment.date)
+                counted_payment_ids.add(payment.id)
+            
+            for payment in ref_payments_by_order.get(order._origin.id, ()):
+                if payment.id in counted_payment_ids:
+                    continue
+                if payment.partner_id.id != order.partner_id.id:
+                    continue
+                total_paid += to_order_currency(payment.amount, payment.currency_id, order, payment.date)
+            
+            paid_amounts[order.id] = total_paid
+        return paid_amounts
+    
+    def _get_order_currency_converter(self):
+        """
+        Retorna una función to_order_currency(amount, currency, order, date) que
+        convierte a la moneda de la orden con una tasa por (moneda, compañía,
+        fecha), compartida por todas las conversiones del recordset.
+        """
+        rates = {}
+        
+        def to_order_currency(amount, currency, order, date):
+            order_currency = order.currency_id
+            if not amount or not currency or not order_currency or currency == order_currency:
+                return amount
+            key = (currency.id, order_currency.id, order.company_id.id, date)
+            if key not in rates:
+                rates[key] = currency._get_conversion_rate(
+                    currency, order_currency, order.company_id, date or fields.Date.context_today(order)
+                )
+            return order_currency.round(amount * rates[key])
+        return to_order_currency
+    
+    def _get_ids_with_payment_inputs(self):
+        """
+        Retorna los ids (guardados) de las órdenes que tienen alguna factura
+        confirmada, pago directo o pago por referencia, con una sola consulta.
+        """
+        order_ids = self._origin.ids
+        if not order_ids:
+            return set()
+        self.env['account.move'].flush_model(['state', 'move_type'])
+        self.env['account.move.line'].flush_model(['move_id', 'purchase_line_id'])
+        self.env['account.payment'].flush_model(
+            ['purchase_id', 'state', 'payment_type', 'referenced_purchase_ids']
+        )
+        self.env.cr.execute("""
+            SELECT po.id
+              FROM purchase_order po
+             WHERE po.id = ANY(%(order_ids)s)
+               AND (EXISTS (
+                        SELECT 1
+                          FROM purchase_order_line pol
+                          JOIN account_move_line aml ON aml.purchase_line_id = pol.id
+                          JOIN account_move am ON am.id = aml.move_id
+                         WHERE pol.order_id = po.id
+                           AND am.move_type = 'in_invoice'
+                           AND am.state = 'posted'
+                    )
+                    OR EXISTS (
+                        SELECT 1
+                          FROM account_payment ap
+                         WHERE ap.purchase_id = po.id
+                           AND ap.state IN ('paid', 'in_process')
+                           AND ap.payment_type = 'outbound'
+                    )
+                    OR EXISTS (
+                        SELECT 1
+                          FROM account_payment_purchase_order_ref_rel rel
+                          JOIN account_payment ap ON ap.id = rel.payment_id
+                         WHERE rel.purchase_id = po.id
+                           AND ap.state IN ('paid', 'in_process')
+                           AND ap.payment_type = 'outbound'
+                    ))
+        """, {'order_ids': order_ids})
+        return {order_id for order_id, in self.env.cr.fetchall()}
+    
+    @api.depends('partner_id', 'currency_id',
+                 'direct_payment_ids', 'direct_payment_ids.amount',
+                 'direct_payment_ids.state', 'direct_payment_ids.payment_type',
+                 'direct_payment_ids.currency_id', 'direct_payment_ids.date',
+                 'referencing_payment_ids', 'referencing_payment_ids.amount',
+                 'referencing_payment_ids.state', 'referencing_payment_ids.payment_type',
+                 'referencing_payment_ids.partner_id', 'referencing_payment_ids.currency_id',
+                 'referencing_payment_ids.date')
+    def _compute_payment_aggregates(self):
+        """
+        Cuenta y suma los pagos directos y por referencia de cada orden con
+        consultas agrupadas; solo se recalculan las órdenes de los pagos modificados.
+        Los montos se convierten a la moneda de la orden a la fecha de cada pago.
+        """
+        if self.env.context.get(DEFER_STATUS_CONTEXT):
+            self.update({'direct_payment_count': 0, 'direct_payment_amount': 0.0, 'matched_payment_amount': 0.0})
+            return
+        AccountPayment = self.env['account.payment']
+        order_ids = self._origin.ids
+        payment_counts = {}
+        direct_amounts = defaultdict(list)
+        matched_amounts = defaultdict(lambda: defaultdict(list))
+        if order_ids:
+            posted_domain = [
+                ('state', 'in', ['paid', 'in_process']),
+                ('payment_type', '=', 'outbound'),
+            ]
+            for purchase, count in AccountPayment._read_group(
+                [('purchase_id', 'in', order_ids)], ['purchase_id'], ['__count'],
+            ):
+                payment_counts[purchase.id] = count
+            # Sumas por moneda y fecha del pago; se convierten a la moneda de la orden
+            for purchase, currency, day, amount in AccountPayment._read_group(
+                [('purchase_id', 'in', order_ids)] + posted_domain,
+                ['purchase_id', 'currency_id', 'date:day'], ['amount:sum'],
+            ):
+                direct_amounts[purchase.id].append((amount, currency, day))
+            for purchase, partner, currency, day, amount in AccountPayment._read_group(
+                [('referenced_purchase_ids', 'in', order_ids)] + posted_domain,
+                ['referenced_purchase_ids', 'partner_id', 'currency_id', 'date:day'], ['amount:sum'],
+            ):
+                matched_amounts[purchase.id][partner.id].append((amount, currency, day))
+        
+        to_order_currency = self._get_order_currency_converter()
         for order in self:
-            order.direct_payment_count = self.env['account.payment'].search_count([
-                ('purchase_id', '=', order.id)
-            ])
+            origin_id = order._origin.id
+            order.direct_payment_count = payment_counts.get(origin_id, 0)
+            order.direct_payment_amount = sum(
+                to_order_currency(amount, currency, order, day)
+                for amount, currency, day in direct_amounts[origin_id]
+            )
+            order.matched_payment_amount = sum(
+                to_order_currency(amount, currency, order, day)
+                for amount, currency, day in matched_amounts[origin_id][order.partner_id.id]
+            )
+    
+    def _recompute_fields(self, fnames):
+        """
+        Marca los campos almacenados para recalcular y los guarda en un solo
+        flush: un UPDATE agrupado, sin un write() (ni su lógica de negocio)
+        por cada asignación del compute.
+        """
+        orders = self.with_context(**{DEFER_STATUS_CONTEXT: False})
+        for fname in fnames:
+            orders.env.add_to_compute(orders._fields[fname], orders)
+        orders.flush_recordset(fnames)
+    
+    def _recompute_status_fields(self):
+        """Cálculo agrupado de estado de pago y recepción tras crear con DEFER_STATUS_CONTEXT"""
+        self._recompute_fields(DEFERRED_STATUS_FIELDS)
+    
+    def _recompute_payment_status(self):
+        """Recalcula los campos de pago de las órdenes (pagos o facturas modificados)"""
+        self._recompute_fields(PAYMENT_STATUS_ORDER_FIELDS)
     
     def action_view_direct_payments(self):
         """Acción para ver los pagos directamente vinculados a esta orden"""
@@ -242,90 +528,177 @@ class PurchaseOrder(models.Model):
         })
         return action
     
+    def action_export_payment_report(self, file_format='csv'):
+        """
+        Descarga las órdenes seleccionadas en CSV o XLSX por streaming. El
+        filtro completo (active_domain) solo se usa con "seleccionar todo",
+        cuando el cliente web truncó active_ids a su límite.
+        """
+        domain = [('id', 'in', self.ids)]
+        active_domain = self.env.context.get('active_domain')
+        if active_domain is not None:
+            active_ids_limit = int(self.env['ir.config_parameter'].sudo().get_param(ACTIVE_IDS_LIMIT_PARAM, 20000))
+            if len(self) >= active_ids_limit:
+                domain = active_domain
+        export = self.env['purchase.order.export'].create({
+            'domain': json.dumps(domain),
+            'file_format': file_format,
+        })
+        return export.action_download()
+    
     def action_recalculate_payment_status(self):
         """Botón para forzar recálculo del estado de pago (útil para debugging)"""
-        for order in self:
-            order._compute_payment_status()
+        self._recompute_payment_status()
         return True
 
     # Método para generar número de orden personalizado
-    @api.model
-    def create(self, vals):
-        if vals.get('name', 'New') == 'New':
-            vals['name'] = self._generate_custom_purchase_number()
-        return super(PurchaseOrder, self).create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        # Agrupar por compañía y año para reservar los números de una sola vez
+        pending = defaultdict(list)
+        for vals in vals_list:
+            if vals.get('name', 'New') != 'New':
+                continue
+            company = self.env['res.company'].browse(vals.get('company_id')) or self.env.company
+            if vals.get('date_order'):
+                sequence_date = fields.Datetime.context_timestamp(
+                    self, fields.Datetime.to_datetime(vals['date_order'])
+                ).date()
+            else:
+                sequence_date = fields.Date.context_today(self)
+            pending[(company, sequence_date.year)].append((vals, sequence_date))
+        
+        for (company, _year), items in pending.items():
+            names = self._generate_custom_purchase_numbers(
+                len(items), company=company, sequence_date=items[0][1]
+            )
+            for (vals, _sequence_date), name in zip(items, names):
+                vals['name'] = name
+        return super(PurchaseOrder, self).create(vals_list)
+    
+    def write(self, vals):
+        if 'partner_id' in vals:
+            # El proveedor anterior pierde la orden: sus indicadores se recalculan
+            self.env['purchase.supplier.metrics.queue'].sudo()._enqueue([
+                order.partner_id.id for order in self if order.partner_id.id != vals['partner_id']
+            ])
+        result = super().write(vals)
+        # Los PDF en caché afectados quedan marcados en purchase.order.report.cache
+        self.env['purchase.order.report.cache']._schedule_refresh()
+        return result
+    
+    def unlink(self):
+        self.env['purchase.supplier.metrics.queue'].sudo()._enqueue(self.partner_id.ids)
+        return super().unlink()
     
     def _generate_custom_purchase_number(self):
         """Genera el número de orden en formato YYYY-NNNN"""
-        current_year = datetime.now().year
-        
-        # Buscar la última orden del año actual
-        last_order = self.search([
-            ('name', 'like', f'{current_year}-')
-        ], order='name desc', limit=1)
+        return self._generate_custom_purchase_numbers(1)[0]
+    
+    @api.model
+    @perf_hook('purchase.order._generate_custom_purchase_numbers',
+               record_count=lambda self, args, kwargs: args[0] if args else kwargs.get('count', 0))
+    def _generate_custom_purchase_numbers(self, count, company=None, sequence_date=None):
+        """
+        Reserva `count` números consecutivos de la secuencia de órdenes de compra
+        (rango anual de ir.sequence) con una sola consulta.
+        """
+        company = company or self.env.company
+        sequence_date = sequence_date or fields.Date.context_today(self)
+        sequence = self._get_custom_purchase_sequence(company)
+        date_range = sequence._get_current_sequence(sequence_date=sequence_date)
+        increment = sequence.number_increment
         
-        if last_order and last_order.name:
-            try:
-                # Extraer el número secuencial
-                number_part = last_order.name.split('-')[-1]
-                next_number = int(number_part) + 1
-            except (ValueError, IndexError):
-                next_number = 1
+        if sequence.implementation == 'standard':
+            self.env.cr.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)",
+                ['ir_sequence_%03d_%03d' % (sequence.id, date_range.id), count],
+            )
+            numbers = sorted(row[0] for row in self.env.cr.fetchall())
         else:
-            next_number = 1
+            # no_gap: el UPDATE bloquea el rango hasta el fin de la transacción
+            date_range.flush_recordset()
+            self.env.cr.execute("""
+                UPDATE ir_sequence_date_range
+                   SET number_next = number_next + %(step)s
+                 WHERE id = %(id)s
+             RETURNING number_next - %(step)s
+            """, {'step': count * increment, 'id': date_range.id})
+            first_number = self.env.cr.fetchone()[0]
+            date_range.invalidate_recordset(['number_next'])
+            numbers = range(first_number, first_number + count * increment, increment)
         
-        return f'{current_year}-{next_number:04d}'
+        sequence = sequence.with_context(
+            ir_sequence_date=sequence_date,
+            ir_sequence_date_range=date_range.date_from,
+        )
+        return [sequence.get_next_char(number) for number in numbers]
+    
+    @api.model
+    def _get_custom_purchase_sequence(self, company):
+        """Secuencia propia de la compañía o, si no existe, la secuencia global"""
+        return self.env['ir.sequence'].sudo().search([
+            ('code', '=', CUSTOM_PURCHASE_SEQUENCE_CODE),
+            ('company_id', 'in', [company.id, False]),
+        ], order='company_id', limit=1)
+    
+    @api.model
+    def _create_company_purchase_sequence(self, company):
+        """Crea la secuencia propia de la compañía continuando su numeración actual"""
+        sequence = self.env['ir.sequence'].sudo().create({
+            'name': f'Orden de Compra Personalizada ({company.name})',
+            'code': CUSTOM_PURCHASE_SEQUENCE_CODE,
+            'prefix': '%(range_year)s-',
+            'padding': 4,
+            'use_date_range': True,
+            'implementation': company.purchase_sequence_implementation,
+            'company_id': company.id,
+        })
+        self._seed_custom_purchase_sequence(sequence)
+        return sequence
+    
+    @api.model
+    def _seed_custom_purchase_sequence(self, sequence):
+        """Ajusta los rangos anuales de la secuencia al último número YYYY-NNNN usado"""
+        self.flush_model(['name', 'company_id'])
+        query = """
+            SELECT substring(name from 1 for 4)::int, max(substring(name from 6)::bigint)
+              FROM purchase_order
+             WHERE name ~ '^\\d{4}-\\d+$'
+        """
+        params = []
+        if sequence.company_id:
+            query += " AND company_id = %s"
+            params.append(sequence.company_id.id)
+        query += " GROUP BY 1"
+        self.env.cr.execute(query, params)
+        for year, last_number in self.env.cr.fetchall():
+            date_range = sequence._get_current_sequence(sequence_date=date(year, 1, 1))
+            if date_range.number_next_actual <= last_number:
+                date_range.number_next_actual = last_number + 1
+    
+    @api.model
+    def _set_custom_purchase_sequence_implementation(self, sequence, implementation):
+        """Cambia la implementación de la secuencia conservando el siguiente número de cada año"""
+        if sequence.implementation == implementation:
+            return
+        next_numbers = {
+            date_range: date_range.number_next_actual
+            for date_range in sequence.date_range_ids
+        }
+        sequence.implementation = implementation
+        for date_range, number_next in next_numbers.items():
+            date_range.number_next_actual = number_next
     
     # Método para obtener datos bancarios del proveedor
     def get_supplier_bank_info(self):
         """Retorna información bancaria del proveedor usando cuentas nativas"""
-        if self.partner_id and self.partner_id.bank_ids:
-            # Buscar cuenta principal o tomar la primera
-            main_account = self.partner_id.bank_ids.filtered('is_main_account')
-            if not main_account:
-                main_account = self.partner_id.bank_ids[0]
-            
-            return {
-                'bank_name': main_account.bank_id.name if main_account.bank_id else '',
-                'account_number': main_account.acc_number or '',
-                'cci_number': main_account.cci_number or '',
-                'account_type': dict(main_account._fields['account_type'].selection).get(main_account.account_type, '') if hasattr(main_account, 'account_type') else '',
-            }
-        return {
-            'bank_name': '',
-            'account_number': '',
-            'cci_number': '',
-            'account_type': '',
-        }
+        return self.env['res.partner']._supplier_bank_values(self.partner_id.supplier_info, '')
     
     # Método para obtener contacto de compras del proveedor
     def get_purchase_contact_info(self):
         """Retorna información del contacto de compras usando contactos relacionados"""
-        if self.partner_id:
-            # Buscar contacto específico para compras
-            purchase_contact = self.partner_id.child_ids.filtered(
-                lambda c: c.function and 'compra' in c.function.lower()
-            )
-            
-            if purchase_contact:
-                contact = purchase_contact[0]
-                return {
-                    'name': contact.name,
-                    'phone': contact.phone or contact.mobile or self.partner_id.phone,
-                    'email': contact.email or self.partner_id.email,
-                }
-            else:
-                # Usar datos del proveedor principal
-                return {
-                    'name': self.partner_id.name,
-                    'phone': self.partner_id.phone or self.partner_id.mobile,
-                    'email': self.partner_id.email,
-                }
-        return {
-            'name': '',
-            'phone': '',
-            'email': '',
-        }
+        return self.env['res.partner']._supplier_contact_values(self.partner_id.supplier_info)
     
     # Método para marcar como aprobado por tesorería
     def approve_by_treasury(self):
@@ -337,36 +710,193 @@ class PurchaseOrder(models.Model):
     
     # Método para registrar fecha de cancelación
     def register_payment_date(self, payment_date=None):
-        """Registra una fecha de pago/cancelación"""
-        if not payment_date:
-            payment_date = fields.Date.today()
-        
-        current_dates = self.cancellation_dates or ''
-        new_date = f"{payment_date.strftime('%d/%m/%Y')}"
-        
-        if current_dates:
-            self.cancellation_dates = f"{current_dates}, {new_date}"
-        else:
-            self.cancellation_dates = new_date
+        """Registra una fecha de pago/cancelación en todas las órdenes del recordset"""
+        payment_date = fields.Date.to_date(payment_date) or fields.Date.today()
+        CancellationDate = self.env['purchase.order.cancellation.date']
+        registered = CancellationDate.search([
+            ('purchase_id', 'in', self.ids),
+            ('date', '=', payment_date),
+        ]).purchase_id
+        # Un solo INSERT para todas las órdenes pendientes
+        CancellationDate.create([
+            {'purchase_id': order.id, 'date': payment_date}
+            for order in self - registered
+        ])
     
-    # Campos computados para el reporte
-    @api.depends('date_order')
-    def _compute_formatted_date(self):
-        for record in self:
-            if record.date_order:
-                date = fields.Datetime.from_string(record.date_order)
-                record.formatted_date = date.strftime('%d/%m/%y')
-            else:
-                record.formatted_date = ""
+    @api.depends('cancellation_date_ids.date')
+    def _compute_cancellation_dates(self):
+        for order in self:
+            order.cancellation_dates = ', '.join(
+                date.strftime('%d/%m/%Y') for date in order.cancellation_date_ids.sorted('date').mapped('date')
+            )
     
+    # Campos de presentación para el reporte: se calculan al imprimir, sin
+    # columna en base de datos, en la zona horaria de la compañía (no la del
+    # usuario o del cron) para que el PDF y su huella en caché sean los mismos
+    # para todos
     formatted_date = fields.Char(
         string='Fecha Formateada',
-        compute='_compute_formatted_date',
-        store=True
+        compute='_compute_report_dates'
+    )
+    
+    formatted_date_planned = fields.Char(
+        string='Fecha de Entrega Formateada',
+        compute='_compute_report_dates'
     )
+    
+    @api.depends('date_order', 'date_planned', 'company_id.partner_id.tz')
+    def _compute_report_dates(self):
+        for record in self:
+            format_date = _get_report_date_formatter(record.company_id.partner_id.tz or REPORT_DEFAULT_TZ)
+            record.formatted_date = format_date(record.date_order)
+            record.formatted_date_planned = format_date(record.date_planned)
 
-    # Campo para almacenar imagen de firma (binary, base64)
-    signature_image = fields.Binary(string='Firma (imagen)')
+    # Imagen de firma guardada como adjunto (el filestore reutiliza el mismo
+    # archivo para firmas idénticas); las variantes reducidas se usan en el
+    # formulario y en el PDF, la imagen original solo se carga al abrirla
+    signature_image = fields.Image(string='Firma (imagen)', max_width=1920, max_height=1920)
+    signature_image_512 = fields.Image(
+        string='Firma (512)',
+        related='signature_image',
+        max_width=512,
+        max_height=512,
+        store=True
+    )
+    signature_image_128 = fields.Image(
+        string='Firma (128)',
+        related='signature_image',
+        max_width=128,
+        max_height=128,
+        store=True
+    )
+    
+    def _get_report_cache_keys(self):
+        """
+        Retorna {order.id: huella sha256} de lo que imprime la plantilla: cabecera,
+        líneas, proveedor (datos bancarios, de contacto e idioma), área, mes,
+        estado, firma, compañía y versión de las vistas del reporte.
+        """
+        ResPartner = self.env['res.partner']
+        supplier_info = ResPartner._read_supplier_info(self.partner_id.ids)
+        signature_checksums = {
+            attachment['res_id']: attachment['checksum']
+            for attachment in self.env['ir.attachment'].sudo().search_read([
+                ('res_model', '=', self._name),
+                ('res_field', '=', 'signature_image_512'),
+                ('res_id', 'in', self.ids),
+            ], ['res_id', 'checksum'])
+        }
+        views = self.env.ref('purchase.report_purchaseorder_document').sudo()
+        views |= views.inherit_children_ids
+        layout = self.env.ref('peruanita_bg_layout.peruanita_layout_background', raise_if_not_found=False)
+        if layout:
+            views |= layout.sudo()
+        template_stamp = sorted((view.id, str(view.write_date)) for view in views)
+        
+        keys = {}
+        for order in self:
+            payload = {
+                'template': template_stamp,
+                'order': [
+                    order.name, order.state, order.date_order, order.date_planned,
+                    order.amount_total, order.currency_id.id, order.formatted_date, order.formatted_date_planned,
+                    order.cancellation_dates, order.purchase_observations, order.supply_month,
+                    order.requesting_department_id.name, order.payment_term_id.name,
+                    signature_checksums.get(order.id),
+                ],
+                'partner': [order.partner_id.name, order.partner_id.vat, order.partner_id.lang],
+                'supplier_info': supplier_info.get(order.partner_id.id),
+                'company': [order.company_id.id, order.company_id.write_date],
+                'lines': [
+                    [line.id, line.display_type, line.name, line.product_qty, line.price_unit,
+                     line.price_subtotal, line.product_uom.name]
+                    for line in order.order_line
+                ],
+            }
+            keys[order.id] = hashlib.sha256(
+                json.dumps(payload, sort_keys=True, default=str).encode()
+            ).hexdigest()
+        return keys
+    
+    def _get_cached_report_pdfs(self):
+        """Retorna {order.id: contenido PDF} de las órdenes con caché vigente"""
+        caches = self.env['purchase.order.report.cache'].sudo().search([('purchase_id', 'in', self.ids)])
+        if not caches:
+            return {}
+        cache_by_order = {cache.purchase_id.id: cache for cache in caches}
+        keys = self.filtered(lambda order: order.id in cache_by_order)._get_report_cache_keys()
+        return {
+            order_id: base64.b64decode(cache.pdf)
+            for order_id, cache in cache_by_order.items()
+            if cache.cache_key == keys[order_id] and cache.pdf
+        }
+    
+    def _store_report_cache(self, content, key=None):
+        """Guarda el PDF renderizado de una orden junto con su huella (sin escribir la orden)"""
+        self.ensure_one()
+        values = {
+            'cache_key': key or self._get_report_cache_keys()[self.id],
+            'pdf': base64.b64encode(content),
+            'dirty': False,
+        }
+        ReportCache = self.env['purchase.order.report.cache'].sudo()
+        cache = ReportCache.search([('purchase_id', '=', self.id)])
+        if cache:
+            cache.write(values)
+        else:
+            ReportCache.create(dict(values, purchase_id=self.id))
+    
+    @api.model
+    def _cron_refresh_report_cache(self, limit=200):
+        """Regenera los PDF en caché cuyos datos cambiaron, confirmando cada orden"""
+        Report = self.env['ir.actions.report'].with_context(purchase_report_no_cache=True)
+        caches = self.env['purchase.order.report.cache'].sudo().search([('dirty', '=', True)], limit=limit)
+        for cache in caches:
+            order = self.browse(cache.purchase_id.id)
+            try:
+                with self.env.cr.savepoint():
+                    key = order._get_report_cache_keys()[order.id]
+                    if cache.cache_key == key and cache.pdf:
+                        cache.dirty = False
+                    else:
+                        content, _content_type = Report._render_qweb_pdf(
+                            'purchase.report_purchaseorder', res_ids=order.ids,
+                        )
+                        order._store_report_cache(content, key)
+            except Exception:
+                # Sin caché la orden se renderiza al imprimirla; la fila no
+                # vuelve a bloquear las siguientes ejecuciones
+                _logger.exception('purchase.order: no se pudo regenerar el PDF en caché de %s', order.display_name)
+                self.env.invalidate_all()
+                cache.unlink()
+            self.env.cr.commit()
+        _logger.info('purchase.order: %s PDF en caché regenerados', len(caches))
+        if len(caches) == limit:
+            self.env.ref('peruanita_purchase_order.ir_cron_refresh_report_cache')._trigger()
+    
+    def init(self):
+        super().init()
+        cr = self.env.cr
+        # Índices para los filtros y agrupaciones de la vista de búsqueda
+        # (los filtros de pago se limitan a órdenes confirmadas)
+        sql.create_index(
+            cr, 'purchase_order_company_payment_status_index', self._table,
+            ['company_id', 'payment_status'], where="state IN ('purchase', 'done')",
+        )
+        sql.create_index(
+            cr, 'purchase_order_company_department_index', self._table,
+            ['company_id', 'requesting_department_id'],
+        )
+        sql.create_index(
+            cr, 'purchase_order_company_supply_month_index', self._table,
+            ['company_id', 'supply_month'],
+        )
+        sql.create_index(
+            cr, 'purchase_order_treasury_approved_index', self._table,
+            ['company_id', 'id'], where='treasury_approval',
+        )
+        # Órdenes modificadas desde la marca de agua (indicadores de proveedores)
+        sql.create_index(cr, 'purchase_order_write_date_index', self._table, ['write_date'])
 
 class PurchaseOrderLine(models.Model):
     _inherit = 'purchase.order.line'
@@ -377,16 +907,46 @@ class PurchaseOrderLine(models.Model):
         ('full', 'Totalmente Recibido'),
     ], string='Estado Recepción', compute='_compute_receipt_status_line', store=True)
     
-    @api.depends('qty_received', 'product_qty')
+    # Tipo de línea para el estado de recepción de la orden
+    receipt_kind = fields.Selection([
+        ('goods', 'Bienes'),
+        ('service', 'Servicios'),
+    ], string='Tipo de Recepción', compute='_compute_receipt_kind', store=True)
+    
+    # Cantidad recibida en la unidad de medida del producto (como product_uom_qty)
+    qty_received_product_uom = fields.Float(
+        string='Cantidad Recibida (UdM Producto)',
+        compute='_compute_qty_received_product_uom',
+        store=True,
+        digits='Product Unit of Measure'
+    )
+    
+    @api.depends('product_id.type', 'display_type')
+    def _compute_receipt_kind(self):
+        for line in self:
+            if line.display_type or not line.product_id:
+                line.receipt_kind = False
+            elif line.product_id.type in ['product', 'consu']:
+                line.receipt_kind = 'goods'
+            else:
+                line.receipt_kind = 'service'
+    
+    @api.depends('qty_received', 'product_uom', 'product_id.uom_id')
+    def _compute_qty_received_product_uom(self):
+        for line in self:
+            if line.product_id and line.product_uom and line.product_uom != line.product_id.uom_id:
+                line.qty_received_product_uom = line.product_uom._compute_quantity(
+                    line.qty_received, line.product_id.uom_id
+                )
+            else:
+                line.qty_received_product_uom = line.qty_received
+    
+    @api.depends('receipt_kind', 'qty_received_product_uom', 'product_uom_qty')
     def _compute_receipt_status_line(self):
         for line in self:
-            if line.product_id.type not in ['product', 'consu']:
-                line.receipt_status_line = 'no'
-                continue
-                
-            if line.qty_received == 0:
+            if not line.receipt_kind or line.qty_received_product_uom == 0:
                 line.receipt_status_line = 'no'
-            elif line.qty_received >= line.product_qty:
+            elif line.qty_received_product_uom >= line.product_uom_qty:
                 line.receipt_status_line = 'full'
             else:
-                line.receipt_status_line = 'partial'
\ No newline at end of file
+                line.receipt_status_line = 'partial'
@@ -0,0 +1,26 @@
+from odoo import models, fields
+
+
+class PurchaseOrderCancellationDate(models.Model):
+    _name = 'purchase.order.cancellation.date'
+    _description = 'Fecha de Cancelación de O.C.'
+    _order = 'date, id'
+
+    purchase_id = fields.Many2one(
+        'purchase.order',
+        string='Orden de Compra',
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+    
+    date = fields.Date(
+        string='Fecha',
+        required=True,
+        index=True
+    )
+    
+    _sql_constraints = [
+        ('purchase_date_uniq', 'unique(purchase_id, date)',
+         'La fecha de cancelación ya está registrada en esta orden.'),
+    ]
@@ -0,0 +1,68 @@
+from odoo import api, fields, models
+from odoo.tools import sql
+
+
+class PurchaseOrderReportCache(models.Model):
+    _name = 'purchase.order.report.cache'
+    _description = 'PDF en Caché de O.C.'
+    _order = 'id'
+
+    purchase_id = fields.Many2one(
+        'purchase.order',
+        string='Orden de Compra',
+        required=True,
+        ondelete='cascade'
+    )
+    
+    # Huella de los datos que lee la plantilla (ver purchase.order._get_report_cache_keys)
+    cache_key = fields.Char(string='Huella', required=True)
+    
+    pdf = fields.Binary(string='PDF', attachment=True)
+    
+    dirty = fields.Boolean(
+        string='Por Regenerar',
+        compute='_compute_dirty',
+        store=True
+    )
+    
+    _sql_constraints = [
+        ('purchase_id_uniq', 'unique(purchase_id)', 'La orden ya tiene un PDF en caché.'),
+    ]
+    
+    @api.depends('purchase_id.name', 'purchase_id.state', 'purchase_id.date_order',
+                 'purchase_id.date_planned', 'purchase_id.partner_id', 'purchase_id.company_id',
+                 'purchase_id.requesting_department_id', 'purchase_id.supply_month',
+                 'purchase_id.purchase_observations', 'purchase_id.payment_term_id',
+                 'purchase_id.signature_image_512', 'purchase_id.cancellation_date_ids.date',
+                 'purchase_id.order_line', 'purchase_id.order_line.name',
+                 'purchase_id.order_line.product_qty', 'purchase_id.order_line.price_unit',
+                 'purchase_id.order_line.price_subtotal', 'purchase_id.order_line.product_uom')
+    def _compute_dirty(self):
+        """
+        Marca para regenerar los PDF cuyos datos cambiaron. Solo las órdenes
+        con caché tienen fila aquí: editar las demás no escribe nada.
+        """
+        for cache in self:
+            cache.dirty = True
+    
+    @api.model
+    def _schedule_refresh(self):
+        """Dispara el cron de regeneración al confirmar, si quedó algún PDF por regenerar"""
+        if self.env.cr.precommit.data.get('purchase_order_report_cache.scheduled'):
+            return
+        self.env.cr.precommit.data['purchase_order_report_cache.scheduled'] = True
+        env = self.env
+        
+        @env.cr.precommit.add
+        def trigger_refresh():
+            env['purchase.order.report.cache'].flush_model(['dirty'])
+            env.cr.execute("SELECT 1 FROM purchase_order_report_cache WHERE dirty LIMIT 1")
+            if env.cr.rowcount:
+                env.ref('peruanita_purchase_order.ir_cron_refresh_report_cache').sudo()._trigger()
+    
+    def init(self):
+        super().init()
+        sql.create_index(
+            self.env.cr, 'purchase_order_report_cache_dirty_index', self._table,
+            ['id'], where='dirty',
+        )
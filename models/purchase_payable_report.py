@@ -0,0 +1,187 @@
+import logging
+
+from odoo import api, fields, models, tools
+
+from .purchase_perf_stat import perf_hook
+
+_logger = logging.getLogger(__name__)
+
+
+class PurchasePayableReport(models.Model):
+    _name = 'purchase.payable.report'
+    _description = 'Análisis de Cuentas por Pagar de Compras'
+    _auto = False
+    _order = 'date_order desc, id desc'
+
+    purchase_id = fields.Many2one('purchase.order', string='Orden de Compra', readonly=True)
+    partner_id = fields.Many2one('res.partner', string='Proveedor', readonly=True)
+    requesting_department_id = fields.Many2one('hr.department', string='Área Solicitante', readonly=True)
+    supply_month = fields.Selection(
+        selection=lambda self: self.env['purchase.order']._fields['supply_month'].selection,
+        string='Mes de Abastecimiento',
+        readonly=True
+    )
+    company_id = fields.Many2one('res.company', string='Compañía', readonly=True)
+    company_currency_id = fields.Many2one('res.currency', string='Moneda', readonly=True)
+    user_id = fields.Many2one('res.users', string='Comprador', readonly=True)
+    date_order = fields.Datetime(string='Fecha de Orden', readonly=True)
+    payment_state = fields.Selection([
+        ('no_paid', 'No Pagado'),
+        ('partial', 'Pago Parcial'),
+        ('paid', 'Pagado'),
+    ], string='Estado de Pago', readonly=True)
+    amount_total = fields.Monetary(string='Total O.C.', currency_field='company_currency_id', readonly=True)
+    billed_amount = fields.Monetary(string='Facturado', currency_field='company_currency_id', readonly=True)
+    paid_amount = fields.Monetary(string='Pagado', currency_field='company_currency_id', readonly=True)
+    residual_amount = fields.Monetary(string='Saldo por Pagar', currency_field='company_currency_id', readonly=True)
+    order_count = fields.Integer(string='Órdenes', readonly=True)
+    paid_count = fields.Integer(string='Pagadas', readonly=True)
+    partial_count = fields.Integer(string='Pago Parcial', readonly=True)
+    no_paid_count = fields.Integer(string='No Pagadas', readonly=True)
+    
+    def _query(self):
+        """
+        Una fila por orden confirmada, con todos los importes en la moneda de
+        la compañía para poder sumarlos entre órdenes de distintas monedas.
+        Lo pagado se calcula desde la contabilidad con el mismo criterio que
+        purchase.order._get_paid_amounts: lo pagado de las facturas más los
+        pagos directos o por referencia que no estén conciliados con esas
+        facturas.
+        """
+        return """
+            WITH bill AS (
+                -- Importes firmados en moneda de la compañía (negativos en facturas de proveedor)
+                SELECT DISTINCT pol.order_id, am.id AS move_id,
+                       -am.amount_total_signed AS amount_total,
+                       -am.amount_residual_signed AS amount_residual
+                  FROM account_move_line aml
+                  JOIN purchase_order_line pol ON pol.id = aml.purchase_line_id
+                  JOIN account_move am ON am.id = aml.move_id
+                 WHERE am.move_type = 'in_invoice'
+                   AND am.state = 'posted'
+            ),
+            bill_total AS (
+                SELECT order_id,
+                       sum(amount_total) AS billed_amount,
+                       sum(amount_total - amount_residual) AS paid_amount
+                  FROM bill
+              GROUP BY order_id
+            ),
+            bill_counterpart AS (
+                -- Asientos conciliados con las líneas por pagar de las facturas
+                SELECT DISTINCT bill.order_id, counterpart.move_id
+                  FROM bill
+                  JOIN account_move_line pl ON pl.move_id = bill.move_id
+                  JOIN account_account acc ON acc.id = pl.account_id
+                                          AND acc.account_type = 'liability_payable'
+                  JOIN account_partial_reconcile apr ON pl.id IN (apr.debit_move_id, apr.credit_move_id)
+                  JOIN account_move_line counterpart
+                    ON counterpart.id = CASE WHEN apr.debit_move_id = pl.id
+                                             THEN apr.credit_move_id
+                                             ELSE apr.debit_move_id END
+            ),
+            payment_link AS (
+                SELECT ap.purchase_id AS order_id, ap.id AS payment_id
+                  FROM account_payment ap
+                 WHERE ap.purchase_id IS NOT NULL
+                 UNION
+                SELECT rel.purchase_id, rel.payment_id
+                  FROM account_payment_purchase_order_ref_rel rel
+                  JOIN account_payment ap ON ap.id = rel.payment_id
+                  JOIN purchase_order po ON po.id = rel.purchase_id
+                                        AND po.partner_id = ap.partner_id
+            ),
+            direct AS (
+                SELECT link.order_id, sum(abs(ap.amount_company_currency_signed)) AS paid_amount
+                  FROM payment_link link
+                  JOIN account_payment ap ON ap.id = link.payment_id
+                 WHERE ap.state IN ('paid', 'in_process')
+                   AND ap.payment_type = 'outbound'
+                   AND NOT EXISTS (
+                        SELECT 1
+                          FROM bill_counterpart bc
+                         WHERE bc.order_id = link.order_id
+                           AND bc.move_id = ap.move_id
+                   )
+              GROUP BY link.order_id
+            ),
+            payable AS (
+                SELECT po.id,
+                       po.partner_id,
+                       po.requesting_department_id,
+                       po.supply_month,
+                       po.company_id,
+                       company.currency_id AS company_currency_id,
+                       po.user_id,
+                       po.date_order,
+                       -- currency_rate: unidades de la moneda de la orden por unidad de la compañía
+                       COALESCE(po.amount_total / NULLIF(po.currency_rate, 0), 0) AS amount_total,
+                       COALESCE(bt.billed_amount, 0) AS billed_amount,
+                       COALESCE(bt.paid_amount, 0) + COALESCE(d.paid_amount, 0) AS paid_amount
+                  FROM purchase_order po
+                  JOIN res_company company ON company.id = po.company_id
+             LEFT JOIN bill_total bt ON bt.order_id = po.id
+             LEFT JOIN direct d ON d.order_id = po.id
+                 WHERE po.state IN ('purchase', 'done')
+            ),
+            classified AS (
+                SELECT payable.*,
+                       CASE
+                           WHEN amount_total > 0 AND paid_amount >= amount_total * 0.9999 THEN 'paid'
+                           WHEN amount_total > 0 AND paid_amount > 0 THEN 'partial'
+                           ELSE 'no_paid'
+                       END AS payment_state
+                  FROM payable
+            )
+            SELECT id,
+                   id AS purchase_id,
+                   partner_id,
+                   requesting_department_id,
+                   supply_month,
+                   company_id,
+                   company_currency_id,
+                   user_id,
+                   date_order,
+                   payment_state,
+                   amount_total,
+                   billed_amount,
+                   paid_amount,
+                   GREATEST(amount_total - paid_amount, 0) AS residual_amount,
+                   1 AS order_count,
+                   (payment_state = 'paid')::int AS paid_count,
+                   (payment_state = 'partial')::int AS partial_count,
+                   (payment_state = 'no_paid')::int AS no_paid_count
+              FROM classified
+        """
+    
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(f"CREATE MATERIALIZED VIEW {self._table} AS ({self._query()})")
+        # El índice único permite REFRESH ... CONCURRENTLY (sin bloquear lecturas)
+        self.env.cr.execute(f"CREATE UNIQUE INDEX {self._table}_id_uniq ON {self._table} (id)")
+        for column in ('partner_id', 'requesting_department_id', 'date_order'):
+            self.env.cr.execute(
+                f"CREATE INDEX {self._table}_{column}_index ON {self._table} ({column})"
+            )
+    
+    @api.model
+    @perf_hook('purchase.payable.report.refresh')
+    def refresh(self):
+        """Actualiza la vista materializada sin bloquear las consultas en curso"""
+        self.env.flush_all()
+        self.env.cr.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {self._table}")
+        self.env.invalidate_all()
+        _logger.info('purchase.payable.report: vista materializada actualizada')
+    
+    @api.model
+    def _cron_refresh(self):
+        self.refresh()
+    
+    @api.model
+    def action_refresh(self):
+        """Acción manual desde el menú Acción del reporte"""
+        self.sudo().refresh()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'reload',
+        }
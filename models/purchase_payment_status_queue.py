@@ -0,0 +1,242 @@
+import logging
+import time
+from datetime import timedelta
+
+from odoo import api, fields, models
+from odoo.tools import str2bool
+
+from .purchase_perf_stat import perf_hook
+
+_logger = logging.getLogger(__name__)
+
+DEFERRED_PARAM = 'peruanita_purchase_order.payment_status_deferred'
+BATCH_SIZE_PARAM = 'peruanita_purchase_order.payment_status_batch_size'
+# Última ejecución de la conciliación programada (fecha UTC)
+WATERMARK_PARAM = 'peruanita_purchase_order.payment_status_watermark'
+# Margen sobre la marca de agua para no perder transacciones que confirmaron
+# después de iniciada la ejecución anterior
+WATERMARK_OVERLAP = timedelta(minutes=10)
+# Segundos de espera antes de vaciar la cola, para agrupar ráfagas de escrituras
+DRAIN_DELAY = 10
+
+
+class PurchasePaymentStatusQueue(models.Model):
+    _name = 'purchase.payment.status.queue'
+    _description = 'Cola de recálculo de estado de pago de O.C.'
+    _order = 'id'
+    _log_access = False
+
+    purchase_id = fields.Many2one(
+        'purchase.order',
+        string='Orden de Compra',
+        required=True,
+        ondelete='cascade'
+    )
+    
+    enqueue_date = fields.Datetime(
+        string='Fecha de Encolado',
+        required=True,
+        default=fields.Datetime.now
+    )
+    
+    _sql_constraints = [
+        ('purchase_id_uniq', 'unique(purchase_id)', 'La orden ya está pendiente de recálculo.'),
+    ]
+    
+    @api.model
+    def _is_deferred(self):
+        """Indica si el recálculo de estado de pago está en modo diferido"""
+        return str2bool(self.env['ir.config_parameter'].sudo().get_param(DEFERRED_PARAM, 'False'))
+    
+    @api.model
+    def _enqueue(self, orders):
+        """Registra las órdenes como pendientes de recálculo (sin duplicados)"""
+        if not orders:
+            return
+        self.env.cr.execute("""
+            INSERT INTO purchase_payment_status_queue (purchase_id, enqueue_date)
+                 SELECT order_id, now() AT TIME ZONE 'UTC'
+                   FROM unnest(%s) AS order_id
+            ON CONFLICT (purchase_id) DO NOTHING
+        """, [orders.ids])
+        # Un solo disparo pendiente del cron; se consulta en base de datos (no
+        # en una marca de la transacción) para que un savepoint revertido
+        # descarte la marca junto con el disparo
+        cron = self.env.ref('peruanita_purchase_order.ir_cron_drain_payment_status_queue').sudo()
+        if not self.env['ir.cron.trigger'].sudo().search_count([
+            ('cron_id', '=', cron.id),
+            ('call_at', '>=', fields.Datetime.now()),
+        ], limit=1):
+            cron._trigger(at=fields.Datetime.now() + timedelta(seconds=DRAIN_DELAY))
+    
+    @api.model
+    @perf_hook('purchase.payment.status.queue._drain')
+    def _drain(self, batch_size=500, limit=None, commit=False):
+        """
+        Recalcula las órdenes pendientes por lotes y las retira de la cola.
+        Retorna la cantidad de órdenes procesadas.
+        """
+        processed = 0
+        while not limit or processed < limit:
+            self.env.cr.execute("""
+                DELETE FROM purchase_payment_status_queue
+                 WHERE id IN (
+                        SELECT id
+                          FROM purchase_payment_status_queue
+                      ORDER BY id
+                         LIMIT %s
+                           FOR UPDATE SKIP LOCKED
+                 )
+             RETURNING purchase_id, enqueue_date
+            """, [batch_size])
+            rows = self.env.cr.fetchall()
+            if not rows:
+                break
+            
+            start = time.perf_counter()
+            orders = self.env['purchase.order'].browse([row[0] for row in rows]).exists()
+            orders._recompute_payment_status()
+            latency = fields.Datetime.now() - min(row[1] for row in rows)
+            _logger.info(
+                'purchase.payment.status.queue: %s órdenes recalculadas en %.3fs '
+                '(latencia desde encolado: %.1fs)',
+                len(orders), time.perf_counter() - start, latency.total_seconds(),
+            )
+            processed += len(rows)
+            if commit:
+                self.env.cr.commit()
+        return processed
+    
+    @api.model
+    def _cron_drain(self):
+        """Vacía la cola de recálculo confirmando cada lote por separado"""
+        batch_size = int(self.env['ir.config_parameter'].sudo().get_param(BATCH_SIZE_PARAM, 500))
+        return self._drain(batch_size=batch_size, commit=True)
+    
+    @api.model
+    def _enqueue_changed_since(self, since):
+        """
+        Encola las órdenes confirmadas cuyos datos de pago cambiaron desde
+        `since`: pagos (directos o por referencia), conciliaciones parciales,
+        líneas por pagar (conciliadas o desconciliadas) y facturas. Sin fecha
+        previa se encolan todas las órdenes abiertas.
+        Retorna la cantidad de órdenes encoladas.
+        """
+        self.env.flush_all()
+        if not since:
+            self.env.cr.execute("""
+                INSERT INTO purchase_payment_status_queue (purchase_id, enqueue_date)
+                     SELECT po.id, now() AT TIME ZONE 'UTC'
+                       FROM purchase_order po
+                      WHERE po.state IN ('purchase', 'done')
+                        AND po.payment_status IS DISTINCT FROM 'paid'
+                ON CONFLICT (purchase_id) DO NOTHING
+            """)
+            return self.env.cr.rowcount
+        
+        self.env.cr.execute("""
+            WITH changed_line AS (
+                -- Líneas por pagar cuyo emparejamiento cambió: al conciliar o
+                -- desconciliar se recalculan amount_residual/reconciled/matching_number
+                -- (las conciliaciones eliminadas no dejan rastro en account_partial_reconcile)
+                SELECT DISTINCT aml.move_id
+                  FROM account_move_line aml
+                  JOIN account_account acc ON acc.id = aml.account_id
+                 WHERE aml.write_date > %(since)s
+                   AND acc.account_type = 'liability_payable'
+            ),
+            changed_payment AS (
+                SELECT id, purchase_id
+                  FROM account_payment
+                 WHERE write_date > %(since)s
+                 UNION
+                SELECT ap.id, ap.purchase_id
+                  FROM account_payment ap
+                  JOIN changed_line cl ON cl.move_id = ap.move_id
+            ),
+            changed_move AS (
+                -- Facturas modificadas (incluye cambios de payment_state), asientos
+                -- con líneas por pagar modificadas y conciliaciones nuevas
+                SELECT id AS move_id
+                  FROM account_move
+                 WHERE write_date > %(since)s
+                   AND move_type IN ('in_invoice', 'in_refund')
+                 UNION
+                SELECT move_id
+                  FROM changed_line
+                 UNION
+                SELECT aml.move_id
+                  FROM account_partial_reconcile apr
+                  JOIN account_move_line aml ON aml.id IN (apr.debit_move_id, apr.credit_move_id)
+                 WHERE apr.write_date > %(since)s
+            ),
+            changed_order AS (
+                SELECT purchase_id AS order_id
+                  FROM changed_payment
+                 WHERE purchase_id IS NOT NULL
+                 UNION
+                SELECT rel.purchase_id
+                  FROM account_payment_purchase_order_ref_rel rel
+                  JOIN changed_payment cp ON cp.id = rel.payment_id
+                 UNION
+                SELECT pol.order_id
+                  FROM changed_move cm
+                  JOIN account_move_line aml ON aml.move_id = cm.move_id
+                  JOIN purchase_order_line pol ON pol.id = aml.purchase_line_id
+            )
+            INSERT INTO purchase_payment_status_queue (purchase_id, enqueue_date)
+                 SELECT po.id, now() AT TIME ZONE 'UTC'
+                   FROM purchase_order po
+                   JOIN changed_order co ON co.order_id = po.id
+                  WHERE po.state IN ('purchase', 'done')
+            ON CONFLICT (purchase_id) DO NOTHING
+        """, {'since': since})
+        return self.env.cr.rowcount
+    
+    @api.model
+    @perf_hook('purchase.payment.status.queue._cron_reconcile')
+    def _cron_reconcile(self):
+        """
+        Conciliación programada del estado de pago: encola las órdenes con
+        cambios desde la última ejecución y vacía la cola por lotes,
+        confirmando cada lote. Si la ejecución se interrumpe, las órdenes
+        pendientes quedan en la cola y se procesan en la siguiente.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        start = time.perf_counter()
+        run_date = self.env.cr.now()
+        watermark = fields.Datetime.to_datetime(ICP.get_param(WATERMARK_PARAM))
+        since = watermark and watermark - WATERMARK_OVERLAP
+        
+        enqueued = self._enqueue_changed_since(since)
+        ICP.set_param(WATERMARK_PARAM, fields.Datetime.to_string(run_date))
+        # La marca de agua y la cola se confirman juntas antes de recalcular
+        self.env.cr.commit()
+        
+        batch_size = int(ICP.get_param(BATCH_SIZE_PARAM, 500))
+        processed = self._drain(batch_size=batch_size, commit=True)
+        elapsed = time.perf_counter() - start
+        _logger.info(
+            'purchase.payment.status.queue: conciliación programada, %s órdenes encoladas, '
+            '%s recalculadas en %.1fs (%.1f órdenes/s)',
+            enqueued, processed, elapsed, processed / elapsed if elapsed else 0.0,
+        )
+        return {
+            'enqueued': enqueued,
+            'processed': processed,
+            'seconds': round(elapsed, 3),
+        }
+    
+    @api.model
+    def get_queue_stats(self):
+        """Profundidad de la cola y antigüedad (segundos) del elemento más antiguo"""
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT count(*), EXTRACT(EPOCH FROM (now() AT TIME ZONE 'UTC') - min(enqueue_date))
+              FROM purchase_payment_status_queue
+        """)
+        depth, oldest_age = self.env.cr.fetchone()
+        return {
+            'depth': depth,
+            'oldest_age_seconds': float(oldest_age or 0.0),
+        }
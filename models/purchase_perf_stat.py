@@ -0,0 +1,120 @@
+import functools
+import json
+import logging
+import time
+
+from odoo import api, fields, models, tools
+from odoo.tools import str2bool
+
+_logger = logging.getLogger(__name__)
+
+PERF_ENABLED_PARAM = 'peruanita_purchase_order.perf_enabled'
+PERF_RETENTION_PARAM = 'peruanita_purchase_order.perf_retention_days'
+
+
+def perf_hook(entry_point, record_count=None):
+    """
+    Decorador para los puntos críticos del módulo: si el perfilado está activo
+    (parámetro del sistema peruanita_purchase_order.perf_enabled) registra
+    consultas SQL, tiempo y cantidad de registros de cada llamada.
+
+    `record_count(self, args, kwargs)` permite contar registros en métodos
+    @api.model; por defecto se usa len(self).
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            PerfStat = self.env['purchase.perf.stat']
+            if not PerfStat._is_enabled():
+                return method(self, *args, **kwargs)
+            cr = self.env.cr
+            start_queries = cr.sql_log_count
+            start = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                PerfStat._record(
+                    entry_point,
+                    duration_ms=(time.perf_counter() - start) * 1000,
+                    query_count=cr.sql_log_count - start_queries,
+                    record_count=record_count(self, args, kwargs) if record_count else len(self),
+                )
+        return wrapper
+    return decorator
+
+
+class PurchasePerfStat(models.Model):
+    _name = 'purchase.perf.stat'
+    _description = 'Medición de Rendimiento de Compras'
+    _order = 'date desc, id desc'
+    _log_access = False
+
+    entry_point = fields.Char(string='Punto de Entrada', required=True, index=True)
+    date = fields.Datetime(string='Fecha', required=True, index=True, default=fields.Datetime.now)
+    duration_ms = fields.Float(string='Duración (ms)', digits=(16, 3))
+    query_count = fields.Integer(string='Consultas SQL')
+    record_count = fields.Integer(string='Registros')
+    
+    @api.model
+    def _is_enabled(self):
+        return str2bool(self.env['ir.config_parameter'].sudo().get_param(PERF_ENABLED_PARAM, 'False'))
+    
+    @api.model
+    def _record(self, entry_point, duration_ms, query_count, record_count):
+        """Escribe la medición en el log estructurado y en la tabla de estadísticas"""
+        _logger.info('perf %s', json.dumps({
+            'db': self.env.cr.dbname,
+            'entry_point': entry_point,
+            'duration_ms': round(duration_ms, 3),
+            'queries': query_count,
+            'records': record_count,
+        }))
+        self.env.cr.execute("""
+            INSERT INTO purchase_perf_stat (entry_point, date, duration_ms, query_count, record_count)
+                 VALUES (%s, now() AT TIME ZONE 'UTC', %s, %s, %s)
+        """, [entry_point, duration_ms, query_count, record_count])
+    
+    @api.autovacuum
+    def _gc_perf_stats(self):
+        """Elimina las mediciones más antiguas que el periodo de retención"""
+        days = int(self.env['ir.config_parameter'].sudo().get_param(PERF_RETENTION_PARAM, 30))
+        self.env.cr.execute("""
+            DELETE FROM purchase_perf_stat
+             WHERE date < (now() AT TIME ZONE 'UTC') - make_interval(days => %s)
+        """, [days])
+
+
+class PurchasePerfStatReport(models.Model):
+    _name = 'purchase.perf.stat.report'
+    _description = 'Percentiles de Rendimiento de Compras'
+    _auto = False
+    _order = 'day desc, entry_point'
+
+    entry_point = fields.Char(string='Punto de Entrada', readonly=True)
+    day = fields.Date(string='Día', readonly=True)
+    call_count = fields.Integer(string='Llamadas', readonly=True)
+    p50_ms = fields.Float(string='p50 (ms)', readonly=True, aggregator='max')
+    p95_ms = fields.Float(string='p95 (ms)', readonly=True, aggregator='max')
+    max_ms = fields.Float(string='Máximo (ms)', readonly=True, aggregator='max')
+    p50_queries = fields.Float(string='p50 Consultas', readonly=True, aggregator='max')
+    p95_queries = fields.Float(string='p95 Consultas', readonly=True, aggregator='max')
+    record_count = fields.Integer(string='Registros', readonly=True)
+    
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT min(id) AS id,
+                       entry_point,
+                       date::date AS day,
+                       count(*) AS call_count,
+                       percentile_cont(0.5) WITHIN GROUP (ORDER BY duration_ms) AS p50_ms,
+                       percentile_cont(0.95) WITHIN GROUP (ORDER BY duration_ms) AS p95_ms,
+                       max(duration_ms) AS max_ms,
+                       percentile_cont(0.5) WITHIN GROUP (ORDER BY query_count) AS p50_queries,
+                       percentile_cont(0.95) WITHIN GROUP (ORDER BY query_count) AS p95_queries,
+                       sum(record_count) AS record_count
+                  FROM purchase_perf_stat
+              GROUP BY entry_point, date::date
+            )
+        """)
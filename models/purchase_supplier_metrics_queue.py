@@ -0,0 +1,47 @@
+from odoo import api, fields, models
+
+
+class PurchaseSupplierMetricsQueue(models.Model):
+    _name = 'purchase.supplier.metrics.queue'
+    _description = 'Proveedores con Indicadores por Recalcular'
+    _order = 'id'
+    _log_access = False
+
+    partner_id = fields.Many2one(
+        'res.partner',
+        string='Proveedor',
+        required=True,
+        ondelete='cascade'
+    )
+    
+    _sql_constraints = [
+        ('partner_id_uniq', 'unique(partner_id)', 'El proveedor ya está pendiente de recálculo.'),
+    ]
+    
+    @api.model
+    def _enqueue(self, partner_ids):
+        """
+        Registra proveedores que perdieron órdenes (orden eliminada o movida a
+        otro proveedor): la marca de agua de write_date ya no los encuentra
+        """
+        partner_ids = list({partner_id for partner_id in partner_ids if partner_id})
+        if not partner_ids:
+            return
+        self.env.cr.execute("""
+            INSERT INTO purchase_supplier_metrics_queue (partner_id)
+                 SELECT partner_id
+                   FROM unnest(%s) AS partner_id
+            ON CONFLICT (partner_id) DO NOTHING
+        """, [partner_ids])
+    
+    @api.model
+    def _get_partner_ids(self):
+        self.env.cr.execute("SELECT partner_id FROM purchase_supplier_metrics_queue ORDER BY id")
+        return [row[0] for row in self.env.cr.fetchall()]
+    
+    @api.model
+    def _dequeue(self, partner_ids):
+        """Retira los proveedores ya recalculados (se confirma junto con el lote)"""
+        self.env.cr.execute(
+            "DELETE FROM purchase_supplier_metrics_queue WHERE partner_id = ANY(%s)", [list(partner_ids)]
+        )
@@ -0,0 +1,29 @@
+from odoo import models, fields
+
+
+class ResCompany(models.Model):
+    _inherit = 'res.company'
+
+    # Implementación de la secuencia de órdenes de compra (YYYY-NNNN)
+    purchase_sequence_implementation = fields.Selection([
+        ('standard', 'Estándar'),
+        ('no_gap', 'Sin huecos'),
+    ], string='Numeración de O.C.', default='standard', required=True,
+        help='Estándar: no bloquea la creación concurrente de órdenes, pero puede '
+             'dejar números sin usar si se revierte una transacción.\n'
+             'Sin huecos: numeración continua; las órdenes se numeran una transacción a la vez.')
+    
+    def write(self, vals):
+        """Aplicar el cambio de implementación a la secuencia de la compañía"""
+        result = super().write(vals)
+        if 'purchase_sequence_implementation' in vals:
+            PurchaseOrder = self.env['purchase.order']
+            for company in self:
+                sequence = PurchaseOrder._get_custom_purchase_sequence(company)
+                if sequence.company_id == company:
+                    PurchaseOrder._set_custom_purchase_sequence_implementation(
+                        sequence, company.purchase_sequence_implementation
+                    )
+                else:
+                    PurchaseOrder._create_company_purchase_sequence(company)
+        return result
@@ -1,4 +1,17 @@
+import logging
+import re
+from datetime import timedelta
+
 from odoo import models, fields, api
+from odoo.osv import expression
+from odoo.tools import split_every, sql
+
+_logger = logging.getLogger(__name__)
+
+# Última ejecución de la actualización de indicadores de proveedores (fecha UTC)
+SUPPLIER_METRICS_WATERMARK_PARAM = 'peruanita_purchase_order.supplier_metrics_watermark'
+# Margen sobre la marca de agua para transacciones confirmadas durante la ejecución anterior
+SUPPLIER_METRICS_OVERLAP = timedelta(minutes=10)
 
 
 class ResPartner(models.Model):
@@ -32,50 +45,262 @@ class ResPartner(models.Model):
         ('evaluation', 'En Evaluación'),
     ], string='Estado del Proveedor', default='active')
     
+    # Indicadores de desempeño calculados desde las órdenes confirmadas. No
+    # dependen de las órdenes: los actualiza el cron _cron_update_supplier_metrics
+    # para los proveedores con órdenes modificadas, así editar una solicitud de
+    # cotización no bloquea la fila del proveedor
+    supplier_order_count = fields.Integer(
+        string='Órdenes Confirmadas',
+        readonly=True
+    )
+    
+    supplier_avg_lead_days = fields.Float(
+        string='Plazo Promedio (días)',
+        readonly=True,
+        digits=(16, 1),
+        help='Días promedio entre la fecha de la orden y la primera recepción'
+    )
+    
+    supplier_on_time_rate = fields.Float(
+        string='Entregas a Tiempo (%)',
+        readonly=True,
+        digits=(16, 1),
+        help='Porcentaje de órdenes recibidas hasta la fecha prevista'
+    )
+    
+    supplier_outstanding_amount = fields.Monetary(
+        string='Saldo por Pagar',
+        readonly=True,
+        currency_field='currency_id',
+        help='Monto pendiente de pago de las órdenes confirmadas, en moneda de la compañía'
+    )
+    
+    supplier_receipt_full_rate = fields.Float(
+        string='Recepción Completa (%)',
+        readonly=True,
+        digits=(16, 1)
+    )
+    
+    supplier_receipt_partial_rate = fields.Float(
+        string='Recepción Parcial (%)',
+        readonly=True,
+        digits=(16, 1)
+    )
+    
+    # RUC/DNI solo con dígitos, para búsquedas exactas o por prefijo
+    vat_normalized = fields.Char(
+        string='RUC/DNI Normalizado',
+        compute='_compute_vat_normalized',
+        store=True
+    )
+    
+    @api.depends('vat')
+    def _compute_vat_normalized(self):
+        for partner in self:
+            partner.vat_normalized = re.sub(r'\D', '', partner.vat or '') or False
+    
+    def _update_supplier_metrics(self):
+        """Agrega las órdenes de todos los proveedores del lote en una consulta y guarda solo los cambios"""
+        metrics = {}
+        partner_ids = self.ids
+        if partner_ids:
+            self.env['purchase.order'].flush_model([
+                'partner_id', 'state', 'date_order', 'date_planned', 'effective_date',
+                'receipt_status', 'amount_total', 'total_paid_amount', 'currency_rate',
+            ])
+            self.env.cr.execute("""
+                SELECT partner_id,
+                       count(*),
+                       avg(EXTRACT(EPOCH FROM effective_date - date_order) / 86400.0)
+                           FILTER (WHERE effective_date IS NOT NULL),
+                       count(*) FILTER (WHERE effective_date IS NOT NULL),
+                       count(*) FILTER (WHERE effective_date IS NOT NULL
+                                          AND effective_date <= date_planned),
+                       sum(GREATEST(COALESCE(amount_total, 0) - COALESCE(total_paid_amount, 0), 0)
+                           / COALESCE(NULLIF(currency_rate, 0), 1)),
+                       count(*) FILTER (WHERE receipt_status = 'full'),
+                       count(*) FILTER (WHERE receipt_status = 'partial')
+                  FROM purchase_order
+                 WHERE partner_id IN %s
+                   AND state IN ('purchase', 'done')
+              GROUP BY partner_id
+            """, [tuple(partner_ids)])
+            for (partner_id, order_count, avg_lead, received_count, on_time_count,
+                 outstanding, full_count, partial_count) in self.env.cr.fetchall():
+                metrics[partner_id] = {
+                    'supplier_order_count': order_count,
+                    'supplier_avg_lead_days': avg_lead or 0.0,
+                    'supplier_on_time_rate': on_time_count * 100.0 / received_count if received_count else 0.0,
+                    'supplier_outstanding_amount': outstanding or 0.0,
+                    'supplier_receipt_full_rate': full_count * 100.0 / order_count,
+                    'supplier_receipt_partial_rate': partial_count * 100.0 / order_count,
+                }
+        empty = {
+            'supplier_order_count': 0,
+            'supplier_avg_lead_days': 0.0,
+            'supplier_on_time_rate': 0.0,
+            'supplier_outstanding_amount': 0.0,
+            'supplier_receipt_full_rate': 0.0,
+            'supplier_receipt_partial_rate': 0.0,
+        }
+        for partner in self:
+            values = metrics.get(partner.id, empty)
+            if any(partner[fname] != value for fname, value in values.items()):
+                partner.write(values)
+    
+    @api.model
+    def _cron_update_supplier_metrics(self, batch_size=500):
+        """
+        Recalcula los indicadores de los proveedores cuyas órdenes cambiaron
+        desde la última ejecución (estado, recepción, pagos, fechas) y de los
+        que perdieron órdenes (purchase.supplier.metrics.queue). Sin fecha
+        previa se recalculan todos los proveedores con órdenes.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        run_date = self.env.cr.now()
+        watermark = fields.Datetime.to_datetime(ICP.get_param(SUPPLIER_METRICS_WATERMARK_PARAM))
+        self.env['purchase.order'].flush_model(['partner_id'])
+        if watermark:
+            self.env.cr.execute("""
+                SELECT DISTINCT partner_id
+                  FROM purchase_order
+                 WHERE write_date > %s
+            """, [watermark - SUPPLIER_METRICS_OVERLAP])
+        else:
+            self.env.cr.execute("SELECT DISTINCT partner_id FROM purchase_order")
+        partner_ids = [row[0] for row in self.env.cr.fetchall()]
+        # Proveedores que perdieron órdenes (eliminadas o movidas a otro proveedor)
+        MetricsQueue = self.env['purchase.supplier.metrics.queue'].sudo()
+        partner_ids = list(dict.fromkeys(partner_ids + MetricsQueue._get_partner_ids()))
+        for batch_ids in split_every(batch_size, partner_ids):
+            self.browse(batch_ids).exists()._update_supplier_metrics()
+            MetricsQueue._dequeue(batch_ids)
+            self.env.cr.commit()
+            self.env.invalidate_all()
+        ICP.set_param(SUPPLIER_METRICS_WATERMARK_PARAM, fields.Datetime.to_string(run_date))
+        self.env.cr.commit()
+        _logger.info('res.partner: indicadores de %s proveedores actualizados', len(partner_ids))
+        return len(partner_ids)
+    
+    # Datos bancarios y de contacto (O.C., reportes, exportaciones). Campo no
+    # almacenado: vive en la caché del entorno, se calcula con una consulta
+    # para todos los proveedores precargados y se invalida al modificar los
+    # datos de los que depende
+    supplier_info = fields.Json(
+        string='Datos de Proveedor',
+        compute='_compute_supplier_info'
+    )
+    
+    @api.depends(lambda self: [
+        'name', 'phone', 'mobile', 'email',
+        'bank_ids', 'bank_ids.active', 'bank_ids.acc_number', 'bank_ids.bank_id.name',
+        'bank_ids.is_main_account', 'bank_ids.sequence', 'bank_ids.account_type',
+        'child_ids', 'child_ids.active', 'child_ids.function', 'child_ids.name',
+        'child_ids.phone', 'child_ids.mobile', 'child_ids.email',
+    ] + [f'bank_ids.{fname}' for fname in self.env['res.partner.bank']._get_cci_field_names()])
+    def _compute_supplier_info(self):
+        infos = self._read_supplier_info(self._origin.ids)
+        for partner in self:
+            partner.supplier_info = infos.get(partner._origin.id)
+    
     # Método para obtener la cuenta bancaria principal
     def get_main_bank_account(self):
         """Retorna la cuenta bancaria principal del proveedor"""
-        if self.bank_ids:
-            # Buscar cuenta marcada como principal
-            main_account = self.bank_ids.filtered('is_main_account')
-            if not main_account:
-                main_account = self.bank_ids[0]  # Primera cuenta como principal
-            
-            return {
-                'bank_name': main_account.bank_id.name if main_account.bank_id else 'N/A',
-                'account_number': main_account.acc_number or 'N/A',
-                'cci_number': main_account.cci_number or 'N/A',
-                'account_type': dict(main_account._fields['account_type'].selection).get(main_account.account_type, 'N/A') if hasattr(main_account, 'account_type') else 'N/A',
-            }
-        return {
-            'bank_name': 'N/A',
-            'account_number': 'N/A', 
-            'cci_number': 'N/A',
-            'account_type': 'N/A',
-        }
+        return self._supplier_bank_values(self.supplier_info, 'N/A')
     
     # Método para obtener información completa del contacto de compras
     def get_purchase_contact_info(self):
         """Retorna información del contacto para compras usando contactos relacionados"""
-        # Buscar contacto específico para compras
-        purchase_contact = self.child_ids.filtered(
-            lambda c: c.function and 'compra' in c.function.lower()
-        )
+        return self._supplier_contact_values(self.supplier_info)
+    
+    @api.model
+    def _read_supplier_info(self, partner_ids):
+        """
+        Retorna {partner_id: info} para varios proveedores con una sola consulta:
+        cuenta bancaria principal (o la primera) y contacto cuya función
+        menciona "compra" (o el propio proveedor).
+        """
+        partner_ids = list({pid for pid in partner_ids if pid})
+        if not partner_ids:
+            return {}
+        self.env['res.partner.bank'].flush_model()
+        self.env['res.bank'].flush_model(['name'])
+        self.flush_model(['name', 'complete_name', 'phone', 'mobile', 'email',
+                          'function', 'parent_id', 'active'])
         
-        if purchase_contact:
-            contact = purchase_contact[0]
-            return {
-                'name': contact.name,
-                'phone': contact.phone or contact.mobile or self.phone,
-                'email': contact.email or self.email,
-            }
-        else:
-            # Usar datos del contacto principal
-            return {
-                'name': self.name,
-                'phone': self.phone or self.mobile,
-                'email': self.email,
+        cci_column = 'pb.cci_number' if 'cci_number' in self.env['res.partner.bank']._fields else 'NULL'
+        self.env.cr.execute(f"""
+            SELECT p.id, p.name, p.phone, p.mobile, p.email,
+                   bank.partner_bank_id, bank.bank_name, bank.acc_number, bank.cci_number, bank.account_type,
+                   contact.id, contact.name, contact.phone, contact.mobile, contact.email
+              FROM res_partner p
+         LEFT JOIN LATERAL (
+                    SELECT pb.id AS partner_bank_id, rb.name AS bank_name, pb.acc_number,
+                           {cci_column} AS cci_number, pb.account_type
+                      FROM res_partner_bank pb
+                 LEFT JOIN res_bank rb ON rb.id = pb.bank_id
+                     WHERE pb.partner_id = p.id
+                       AND pb.active
+                  ORDER BY COALESCE(pb.is_main_account, FALSE) DESC, pb.sequence, pb.id
+                     LIMIT 1
+                   ) bank ON TRUE
+         LEFT JOIN LATERAL (
+                    SELECT c.id, c.name, c.phone, c.mobile, c.email
+                      FROM res_partner c
+                     WHERE c.parent_id = p.id
+                       AND c.active
+                       AND c.function ILIKE '%%compra%%'
+                  ORDER BY c.complete_name, c.id DESC
+                     LIMIT 1
+                   ) contact ON TRUE
+             WHERE p.id IN %s
+        """, [tuple(partner_ids)])
+        
+        result = {}
+        for (partner_id, name, phone, mobile, email,
+             partner_bank_id, bank_name, acc_number, cci_number, account_type,
+             contact_id, contact_name, contact_phone, contact_mobile, contact_email) in self.env.cr.fetchall():
+            if contact_id:
+                contact = {
+                    'name': contact_name,
+                    'phone': contact_phone or contact_mobile or phone or False,
+                    'email': contact_email or email or False,
+                }
+            else:
+                contact = {
+                    'name': name,
+                    'phone': phone or mobile or False,
+                    'email': email or False,
+                }
+            bank = partner_bank_id and {
+                'bank_name': bank_name or '',
+                'account_number': acc_number or '',
+                'cci_number': cci_number or '',
+                'account_type': account_type or '',
             }
+            result[partner_id] = {'bank': bank, 'contact': contact}
+        return result
+    
+    @api.model
+    def _supplier_bank_values(self, info, default):
+        """Formatea los datos bancarios usando `default` para valores vacíos"""
+        bank = info and info['bank']
+        if not bank:
+            return {key: default for key in ('bank_name', 'account_number', 'cci_number', 'account_type')}
+        account_types = dict(self.env['res.partner.bank']._fields['account_type'].selection)
+        return {
+            'bank_name': bank['bank_name'] or default,
+            'account_number': bank['account_number'] or default,
+            'cci_number': bank['cci_number'] or default,
+            'account_type': account_types.get(bank['account_type'], default),
+        }
+    
+    @api.model
+    def _supplier_contact_values(self, info):
+        """Copia los datos de contacto (los valores en caché no deben modificarse)"""
+        if not info:
+            return {'name': '', 'phone': '', 'email': ''}
+        return dict(info['contact'])
     
     # Validación de RUC/DNI
     @api.constrains('vat')
@@ -88,26 +313,40 @@ class ResPartner(models.Model):
     
     # Filtros y búsquedas mejoradas
     @api.model
-    def _name_search(self, name, domain=None, operator='ilike', limit=100, order=None):
-        """Permite buscar proveedores por RUC además del nombre"""
-        if domain is None:
-            domain = []
-        
-        # Búsqueda normal
-        result = super(ResPartner, self)._name_search(
-            name, domain=domain, operator=operator, limit=limit, order=order
+    def _search_display_name(self, operator, value):
+        """
+        Si se escribe solo dígitos se agrega la búsqueda por RUC/DNI en
+        vat_normalized (exacto con 8 u 11 dígitos, por prefijo en otro caso)
+        a la búsqueda estándar, que sigue encontrando referencias, nombres o
+        correos con esos dígitos.
+        """
+        domain = super()._search_display_name(operator, value)
+        if operator in ('ilike', '=ilike', 'like', '=like', '=') and isinstance(value, str):
+            digits = value.strip()
+            if digits.isdigit():
+                if len(digits) in (8, 11):  # DNI: 8 dígitos, RUC: 11 dígitos
+                    vat_domain = [('vat_normalized', '=', digits)]
+                else:
+                    vat_domain = [('vat_normalized', '=like', f'{digits}%')]
+                return expression.OR([vat_domain, domain])
+        return domain
+    
+    def init(self):
+        super().init()
+        cr = self.env.cr
+        # Búsqueda exacta y por prefijo de RUC/DNI con índice btree
+        sql.create_index(
+            cr, 'res_partner_vat_normalized_pattern_index', self._table,
+            ['vat_normalized text_pattern_ops'],
         )
-        
-        if name and len(result) < limit:
-            # Búsqueda adicional por RUC/DNI
-            vat_domain = domain + [('vat', operator, name)]
-            vat_results = self._search(vat_domain, limit=limit-len(result), order=order)
-            vat_results = self.browse(vat_results).name_get()
-            
-            # Combinar resultados evitando duplicados
-            existing_ids = {r[0] for r in result}
-            for vat_result in vat_results:
-                if vat_result[0] not in existing_ids:
-                    result.append(vat_result)
-        
-        return result
\ No newline at end of file
+        # Índices trigram para las columnas de búsqueda de texto libre: la
+        # búsqueda por dígitos también las consulta (OR con vat_normalized) y
+        # sin estos índices cada búsqueda recorre toda la tabla
+        if sql.has_trigram(cr):
+            for fname in self._rec_names_search or []:
+                field = self._fields.get(fname)
+                if field and field.store and field.type == 'char' and not field.translate:
+                    sql.create_index(
+                        cr, f'res_partner_{fname}_trgm_index', self._table,
+                        [f'{fname} gin_trgm_ops'], method='gin',
+                    )
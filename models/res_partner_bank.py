@@ -1,4 +1,5 @@
-from odoo import fields, models
+from odoo import api, fields, models
+
 
 class ResPartnerBank(models.Model):
     _inherit = 'res.partner.bank'
@@ -17,14 +18,36 @@ class ResPartnerBank(models.Model):
         default=False
     )
     
-    # Método para formato de visualización de cuenta
-    def name_get(self):
-        result = []
+    # Etiqueta de la cuenta (banco - número (CCI)), almacenada para mostrar y
+    # buscar miles de cuentas sin leer el banco de cada registro
+    account_label = fields.Char(
+        string='Etiqueta de Cuenta',
+        compute='_compute_account_label',
+        store=True,
+        index=True
+    )
+    
+    def _get_cci_field_names(self):
+        """Campos de CCI disponibles según los módulos instalados"""
+        return [fname for fname in ('cci_number', 'l10n_pe_cci') if fname in self._fields]
+    
+    @api.depends(lambda self: ['bank_id.name', 'acc_number'] + self._get_cci_field_names())
+    def _compute_account_label(self):
+        cci_fnames = self._get_cci_field_names()
+        for bank in self:
+            name = f"{bank.bank_id.name or 'Banco'} - {bank.acc_number or 'Sin número'}"
+            cci = next((bank[fname] for fname in cci_fnames if bank[fname]), False)
+            if cci:
+                name += f" (CCI: {cci})"
+            bank.account_label = name
+    
+    @api.depends('account_label')
+    def _compute_display_name(self):
+        super()._compute_display_name()
+        show_trust = self.env.context.get('display_account_trust')
         for bank in self:
-            name = f"{bank.bank_id.name if bank.bank_id else 'Banco'} - {bank.acc_number or 'Sin número'}"
-            if hasattr(bank, 'cci_number') and bank.cci_number:
-                name += f" (CCI: {bank.cci_number})"
-            elif hasattr(bank, 'l10n_pe_cci') and bank.l10n_pe_cci:
-                name += f" (CCI: {bank.l10n_pe_cci})"
-            result.append((bank.id, name))
-        return result
\ No newline at end of file
+            label = bank.account_label or bank.display_name
+            if show_trust and bank.display_name and ' (' in bank.display_name:
+                # Conserva el sufijo traducido de account (de confianza / no confiable)
+                label += ' (' + bank.display_name.rsplit(' (', 1)[1]
+            bank.display_name = label
@@ -0,0 +1 @@
+from . import purchase_order_report
@@ -0,0 +1,40 @@
+from odoo import models, api
+
+
+class ReportPurchaseOrder(models.AbstractModel):
+    _name = 'report.purchase.report_purchaseorder'
+    _description = 'Reporte Orden de Compra'
+
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        """
+        Precalcula en una sola pasada lo que la plantilla lee de cada orden,
+        para imprimir cientos de órdenes sin consultas por documento.
+        """
+        docs = self.env['purchase.order'].browse(docids)
+        
+        # Precargar líneas, unidades y departamentos
+        docs.mapped('order_line.product_uom.name')
+        docs.mapped('requesting_department_id.name')
+        
+        # Datos bancarios y de contacto de todos los proveedores en una consulta
+        ResPartner = self.env['res.partner']
+        supplier_info = ResPartner._read_supplier_info(docs.partner_id.ids)
+        supplier_bank_infos = {
+            partner_id: ResPartner._supplier_bank_values(info, '')
+            for partner_id, info in supplier_info.items()
+        }
+        supplier_contact_infos = {
+            partner_id: ResPartner._supplier_contact_values(info)
+            for partner_id, info in supplier_info.items()
+        }
+        
+        return {
+            'doc_ids': docids,
+            'doc_model': 'purchase.order',
+            'docs': docs,
+            'data': data,
+            'supplier_bank_infos': supplier_bank_infos,
+            'supplier_contact_infos': supplier_contact_infos,
+            'supply_month_labels': dict(self.env['purchase.order']._fields['supply_month'].selection),
+        }
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+from odoo import fields
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+from odoo.tests import tagged
+
+
+@tagged('post_install', '-at_install')
+class TestPurchasePaymentStatus(AccountTestInvoicingCommon):
+    """Estado de pago calculado en lote contra montos calculados a mano"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.product = cls.env['product.product'].create({
+            'name': 'Servicio de Prueba',
+            'type': 'service',
+            'purchase_method': 'purchase',
+            'supplier_taxes_id': [fields.Command.clear()],
+        })
+        cls.other_partner = cls.env['res.partner'].create({'name': 'Otro Proveedor'})
+        cls.order = cls.env['purchase.order'].create({
+            'partner_id': cls.partner_a.id,
+            'order_line': [fields.Command.create({
+                'product_id': cls.product.id,
+                'product_qty': 1,
+                'price_unit': 1000.0,
+            })],
+        })
+        cls.order.button_confirm()
+
+    def _create_payment(self, amount, partner, **values):
+        payment = self.env['account.payment'].create({
+            'payment_type': 'outbound',
+            'partner_type': 'supplier',
+            'partner_id': partner.id,
+            'amount': amount,
+            'journal_id': self.company_data['default_journal_bank'].id,
+            **values,
+        })
+        payment.action_post()
+        return payment
+
+    def test_payment_status_mixed_payments(self):
+        # Factura confirmada por el total de la orden (1000)
+        self.order.action_create_invoice()
+        bill = self.order.invoice_ids
+        bill.invoice_date = fields.Date.today()
+        bill.action_post()
+        self.assertAlmostEqual(bill.amount_total, 1000.0)
+        
+        # Pago directo de 300 conciliado con la factura: cuenta una sola vez
+        reconciled = self.env['account.payment.register'].with_context(
+            active_model='account.move', active_ids=bill.ids,
+        ).create({'amount': 300.0})._create_payments()
+        reconciled.purchase_id = self.order
+        self.assertAlmostEqual(bill.amount_residual, 700.0)
+        
+        # Pago directo de 200 sin conciliar: se suma
+        self._create_payment(200.0, self.partner_a, purchase_id=self.order.id)
+        # Pago de otro proveedor que menciona la orden en el memo: no se suma
+        self._create_payment(150.0, self.other_partner, memo=f'Pago O.C. {self.order.name}')
+        
+        self.order._recompute_payment_status()
+        # 300 (factura) + 200 (directo sin conciliar)
+        self.assertAlmostEqual(self.order.total_paid_amount, 500.0)
+        self.assertAlmostEqual(self.order.payment_percentage, 50.0)
+        self.assertEqual(self.order.payment_status, 'partial')
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+from ..benchmarks import run
+
+
+@tagged('post_install', '-at_install', 'purchase_perf')
+class TestPurchasePerformance(TransactionCase):
+    """
+    Compara la cantidad de consultas de los benchmarks con la línea base
+    medida y versionada en benchmarks/baseline.json (escala 'test'). Solo se
+    comparan consultas: los tiempos dependen de la máquina.
+
+    Ejecutar con: odoo-bin -d <db> -u peruanita_purchase_order --test-tags purchase_perf
+    """
+
+    def test_query_counts_against_baseline(self):
+        baseline = run.load_baselines().get('test')
+        if not baseline:
+            self.skipTest("benchmarks/baseline.json sin la escala 'test': "
+                          "medirla con run.run(env, scale='test', update_baseline=True)")
+        
+        results = run.collect(self.env, scale='test', **run.COLLECT_OPTIONS['test'])
+        # Los tiempos dependen de la máquina: solo se comparan las consultas
+        regressions = [
+            regression for regression in run.compare(results, baseline)
+            if regression['metric'].rsplit('.', 1)[-1] in run.QUERY_METRICS
+        ]
+        self.assertFalse(regressions, f"Regresiones respecto a la línea base: {regressions}")
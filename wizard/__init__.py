@@ -0,0 +1,3 @@
+from . import purchase_treasury_batch
+from . import purchase_order_import
+from . import purchase_order_export
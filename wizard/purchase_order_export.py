@@ -0,0 +1,31 @@
+import json
+
+from odoo import fields, models
+
+
+class PurchaseOrderExport(models.TransientModel):
+    _name = 'purchase.order.export'
+    _description = 'Solicitud de Exportación de Órdenes de Compra'
+
+    domain = fields.Text(string='Dominio', required=True)
+    
+    file_format = fields.Selection([
+        ('csv', 'CSV'),
+        ('xlsx', 'XLSX'),
+    ], string='Formato', default='csv', required=True)
+    
+    def _get_domain(self):
+        self.ensure_one()
+        return json.loads(self.domain)
+    
+    def action_download(self):
+        """
+        La selección se guarda en el registro y la URL solo lleva su id:
+        miles de ids no caben en una URL GET
+        """
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/peruanita_purchase_order/export/{self.id}',
+            'target': 'download',
+        }
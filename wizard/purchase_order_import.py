@@ -0,0 +1,274 @@
+import base64
+import csv
+import io
+import logging
+import re
+from datetime import date, datetime, time
+
+from odoo import fields, models
+from odoo.exceptions import UserError
+from odoo.tools import split_every
+
+from ..models.purchase_order import DEFER_STATUS_CONTEXT
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+_logger = logging.getLogger(__name__)
+
+# Columnas del archivo; las filas de una misma orden comparten "referencia"
+# y deben ir seguidas
+IMPORT_COLUMNS = [
+    'referencia', 'ruc_proveedor', 'area_solicitante', 'mes_abastecimiento', 'fecha_prevista',
+    'producto', 'descripcion', 'cantidad', 'unidad', 'precio_unitario', 'cuenta_bancaria',
+]
+# Formatos aceptados en "fecha_prevista" (el XLSX entrega fechas ya convertidas)
+IMPORT_DATE_FORMATS = ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y', '%d/%m/%Y %H:%M']
+# Errores mostrados como máximo al rechazar el archivo
+MAX_REPORTED_ERRORS = 50
+
+
+class PurchaseOrderImport(models.TransientModel):
+    _name = 'purchase.order.import'
+    _description = 'Importación Masiva de Órdenes de Compra'
+
+    file = fields.Binary(string='Archivo (CSV o XLSX)', required=True)
+    
+    filename = fields.Char(string='Nombre del Archivo')
+    
+    batch_size = fields.Integer(
+        string='Órdenes por Lote',
+        default=500,
+        help='Cantidad de órdenes creadas por cada llamada a create'
+    )
+    
+    order_count = fields.Integer(string='Órdenes Creadas', readonly=True)
+    
+    line_count = fields.Integer(string='Líneas Creadas', readonly=True)
+    
+    def _iter_rows(self):
+        """Recorre el archivo una sola vez retornando (número de fila, {columna: valor})"""
+        content = base64.b64decode(self.file)
+        if (self.filename or '').lower().endswith('.xlsx'):
+            if openpyxl is None:
+                raise UserError('Se requiere la librería openpyxl para importar archivos XLSX.')
+            workbook = openpyxl.load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+            rows = workbook.active.iter_rows(values_only=True)
+        else:
+            text = io.TextIOWrapper(io.BytesIO(content), encoding='utf-8-sig')
+            first_line = text.readline()
+            text.seek(0)
+            rows = csv.reader(text, delimiter=';' if first_line.count(';') > first_line.count(',') else ',')
+        
+        header = [str(column or '').strip().lower() for column in next(rows, [])]
+        missing = {'referencia', 'ruc_proveedor', 'producto', 'cantidad'} - set(header)
+        if missing:
+            raise UserError(f"Faltan columnas en el archivo: {', '.join(sorted(missing))}")
+        for row_number, row in enumerate(rows, start=2):
+            values = {
+                column: value.strip() if isinstance(value, str) else value
+                for column, value in zip(header, row)
+            }
+            if any(value not in (None, '') for value in values.values()):
+                yield row_number, values
+    
+    def _build_lookups(self):
+        """Diccionarios de búsqueda que no dependen del contenido del archivo"""
+        supply_months = {}
+        for key, label in self.env['purchase.order']._fields['supply_month'].selection:
+            supply_months[key] = key
+            supply_months[label.lower()] = key
+        return {
+            'departments': {
+                department.name.lower(): department.id
+                for department in self.env['hr.department'].search_fetch([], ['name'])
+            },
+            'uoms': {
+                uom.name.lower(): uom.id
+                for uom in self.env['uom.uom'].search_fetch([], ['name'])
+            },
+            'supply_months': supply_months,
+            'partners': {},
+            'products': {},
+            'banks': set(),
+        }
+    
+    def _resolve_batch_references(self, groups, lookups):
+        """Busca de una vez los proveedores, productos y cuentas nuevos del lote"""
+        rows = [row for group in groups for _row_number, row in group['rows']]
+        
+        vats = {
+            re.sub(r'\D', '', str(row.get('ruc_proveedor') or ''))
+            for row in rows
+        } - set(lookups['partners']) - {''}
+        if vats:
+            for partner in self.env['res.partner'].search_fetch(
+                [('vat_normalized', 'in', list(vats)), ('parent_id', '=', False)],
+                ['vat_normalized'], order='id',
+            ):
+                lookups['partners'].setdefault(partner.vat_normalized, partner.id)
+        
+        codes = {str(row.get('producto') or '') for row in rows} - set(lookups['products']) - {''}
+        if codes:
+            for product in self.env['product.product'].search_fetch(
+                ['|', ('default_code', 'in', list(codes)), ('name', 'in', list(codes))],
+                ['default_code', 'name'], order='id',
+            ):
+                for key in (product.default_code, product.name):
+                    if key in codes:
+                        lookups['products'].setdefault(key, product.id)
+        
+        accounts = {
+            (lookups['partners'].get(re.sub(r'\D', '', str(row.get('ruc_proveedor') or ''))),
+             str(row.get('cuenta_bancaria')))
+            for row in rows if row.get('cuenta_bancaria')
+        }
+        accounts = {account for account in accounts if account[0]} - lookups['banks']
+        if accounts:
+            for bank in self.env['res.partner.bank'].search_fetch([
+                ('partner_id', 'in', list({partner_id for partner_id, _acc in accounts})),
+                ('acc_number', 'in', list({acc for _partner_id, acc in accounts})),
+            ], ['partner_id', 'acc_number']):
+                lookups['banks'].add((bank.partner_id.id, bank.acc_number))
+            new_accounts = accounts - lookups['banks']
+            if new_accounts:
+                self.env['res.partner.bank'].create([
+                    {'partner_id': partner_id, 'acc_number': acc_number}
+                    for partner_id, acc_number in new_accounts
+                ])
+                lookups['banks'] |= new_accounts
+    
+    def _parse_date(self, value):
+        """
+        Fecha de la celda como datetime, o None si no se reconoce. Las fechas
+        sin hora se toman al mediodía para no cambiar de día al mostrarlas en
+        la zona horaria del usuario.
+        """
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, date):
+            return datetime.combine(value, time(12))
+        for date_format in IMPORT_DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(str(value), date_format)
+            except ValueError:
+                continue
+            return parsed if '%H' in date_format else datetime.combine(parsed.date(), time(12))
+        return None
+    
+    def _prepare_order_vals(self, group, lookups, errors):
+        header_number, header = group['rows'][0]
+        vat = re.sub(r'\D', '', str(header.get('ruc_proveedor') or ''))
+        partner_id = lookups['partners'].get(vat)
+        if not partner_id:
+            errors.append((header_number, f"Proveedor con RUC/DNI '{header.get('ruc_proveedor')}' no encontrado"))
+        
+        vals = {'partner_id': partner_id}
+        department = str(header.get('area_solicitante') or '').lower()
+        if department:
+            vals['requesting_department_id'] = lookups['departments'].get(department)
+            if not vals['requesting_department_id']:
+                errors.append((header_number, f"Área solicitante '{header['area_solicitante']}' no encontrada"))
+        supply_month = str(header.get('mes_abastecimiento') or '').lower()
+        if supply_month:
+            vals['supply_month'] = lookups['supply_months'].get(supply_month)
+            if not vals['supply_month']:
+                errors.append((header_number, f"Mes de abastecimiento '{header['mes_abastecimiento']}' no válido"))
+        if header.get('fecha_prevista'):
+            vals['date_planned'] = self._parse_date(header['fecha_prevista'])
+            if not vals['date_planned']:
+                errors.append((header_number, f"Fecha prevista '{header['fecha_prevista']}' no válida"))
+        
+        lines = []
+        for row_number, row in group['rows']:
+            product_id = lookups['products'].get(str(row.get('producto') or ''))
+            if not product_id:
+                errors.append((row_number, f"Producto '{row.get('producto')}' no encontrado"))
+                continue
+            try:
+                line = {
+                    'product_id': product_id,
+                    'product_qty': float(row.get('cantidad') or 0.0),
+                }
+                if row.get('precio_unitario') not in (None, ''):
+                    line['price_unit'] = float(row['precio_unitario'])
+            except (TypeError, ValueError):
+                errors.append((row_number, 'Cantidad o precio unitario no numérico'))
+                continue
+            if row.get('descripcion'):
+                line['name'] = row['descripcion']
+            if row.get('unidad'):
+                line['product_uom'] = lookups['uoms'].get(str(row['unidad']).lower())
+                if not line['product_uom']:
+                    errors.append((row_number, f"Unidad de medida '{row['unidad']}' no encontrada"))
+                    continue
+            lines.append(fields.Command.create(line))
+        vals['order_line'] = lines
+        return vals
+    
+    def _create_batch(self, groups, lookups, errors):
+        """Crea las órdenes del lote con una sola llamada a create"""
+        self._resolve_batch_references(groups, lookups)
+        vals_list = [self._prepare_order_vals(group, lookups, errors) for group in groups]
+        if errors:
+            # El archivo se rechaza completo; solo se sigue validando
+            return self.env['purchase.order']
+        PurchaseOrder = self.env['purchase.order'].with_context(**{
+            DEFER_STATUS_CONTEXT: True,
+            'tracking_disable': True,
+            'mail_create_nolog': True,
+        })
+        orders = PurchaseOrder.create(vals_list)
+        PurchaseOrder.env.flush_all()
+        return orders
+    
+    def action_import(self):
+        """
+        Lee el archivo en una pasada, resuelve proveedores, áreas, unidades y
+        productos con diccionarios, crea las órdenes por lotes y calcula el
+        estado de pago y de recepción una sola vez al final.
+        """
+        self.ensure_one()
+        batch_size = max(self.batch_size, 1)
+        lookups = self._build_lookups()
+        errors = []
+        order_ids = []
+        line_count = 0
+        groups = []
+        # Primera fila de cada referencia: una referencia que reaparece más
+        # adelante crearía una segunda orden, se rechaza el archivo
+        first_rows = {}
+        for row_number, row in self._iter_rows():
+            reference = str(row.get('referencia') or '')
+            if not groups or groups[-1]['reference'] != reference:
+                if reference in first_rows:
+                    errors.append((row_number, (
+                        f"La referencia '{reference}' ya apareció en la fila {first_rows[reference]}; "
+                        "las filas de una misma orden deben ir seguidas"
+                    )))
+                first_rows.setdefault(reference, row_number)
+                if len(groups) >= batch_size:
+                    order_ids += self._create_batch(groups, lookups, errors).ids
+                    groups = []
+                groups.append({'reference': reference, 'rows': []})
+            groups[-1]['rows'].append((row_number, row))
+            line_count += 1
+        if groups:
+            order_ids += self._create_batch(groups, lookups, errors).ids
+        
+        if errors:
+            raise UserError('No se importó el archivo:\n' + '\n'.join(
+                f'Fila {row_number}: {message}' for row_number, message in errors[:MAX_REPORTED_ERRORS]
+            ))
+        
+        for batch_ids in split_every(batch_size, order_ids, list):
+            self.env['purchase.order'].browse(batch_ids)._recompute_status_fields()
+            self.env.flush_all()
+        _logger.info('purchase.order.import: %s órdenes, %s líneas', len(order_ids), line_count)
+        
+        self.write({'order_count': len(order_ids), 'line_count': line_count})
+        action = self.env['ir.actions.act_window']._for_xml_id('purchase.purchase_rfq')
+        action['domain'] = [('id', 'in', order_ids)]
+        return action
@@ -0,0 +1,49 @@
+from odoo import api, fields, models
+
+
+class PurchaseTreasuryBatch(models.TransientModel):
+    _name = 'purchase.treasury.batch'
+    _description = 'Tesorería por Lotes de Órdenes de Compra'
+
+    purchase_ids = fields.Many2many(
+        'purchase.order',
+        string='Órdenes de Compra',
+        default=lambda self: self._default_purchase_ids()
+    )
+    
+    order_count = fields.Integer(
+        string='Cantidad de Órdenes',
+        compute='_compute_order_count'
+    )
+    
+    operation = fields.Selection([
+        ('approve', 'Aprobar por Tesorería'),
+        ('register_date', 'Registrar Fecha de Cancelación'),
+        ('both', 'Aprobar y Registrar Fecha'),
+    ], string='Operación', default='approve', required=True)
+    
+    payment_date = fields.Date(
+        string='Fecha de Cancelación',
+        default=fields.Date.context_today
+    )
+    
+    @api.model
+    def _default_purchase_ids(self):
+        if self.env.context.get('active_model') == 'purchase.order':
+            return [fields.Command.set(self.env.context.get('active_ids', []))]
+        return []
+    
+    @api.depends('purchase_ids')
+    def _compute_order_count(self):
+        for wizard in self:
+            wizard.order_count = len(wizard.purchase_ids)
+    
+    def action_apply(self):
+        """Aplica la operación a todas las órdenes con escrituras agrupadas"""
+        self.ensure_one()
+        orders = self.purchase_ids
+        if self.operation in ('approve', 'both'):
+            orders.approve_by_treasury()
+        if self.operation in ('register_date', 'both'):
+            orders.register_payment_date(self.payment_date)
+        return {'type': 'ir.actions.act_window_close'}